@@ -3,22 +3,26 @@ REST API Routes
 ===============
 HTTP endpoints for image upload, presets, and batch processing.
 """
-import base64
+import asyncio
 import logging
 from pathlib import Path
 from typing import Annotated
 from uuid import uuid4
 
-from fastapi import APIRouter, File, HTTPException, Query, UploadFile
+import aiofiles
+import orjson
+from fastapi import APIRouter, File, HTTPException, Query, Response, UploadFile
 from pydantic import BaseModel
+from sse_starlette.sse import EventSourceResponse
 
 from ..config import settings, DeploymentTier
 from ..core.engine import (
     HolographicMemoryBank,
     HolographicParameters,
-    HolographicReconstructionEngine,
     ReconstructionMode,
+    get_engine,
 )
+from ..services.job_store import FINISHED_STATES, get_job_store
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -58,6 +62,8 @@ class ProcessResponse(BaseModel):
     job_id: str
     status: str
     message: str
+    status_url: str
+    stream_url: str
 
 
 class JobStatus(BaseModel):
@@ -92,22 +98,38 @@ class MemoryBankInfo(BaseModel):
 
 
 # ============================================================================
-# In-memory stores (would be Redis/DB in production)
+# Shared resources
 # ============================================================================
 
-# Job tracking
-jobs: dict[str, dict] = {}
+# Uploads are streamed to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1 << 20
 
-# Current engine instance
-_engine: HolographicReconstructionEngine | None = None
+# Memory bank listings, reused while a file's (mtime_ns, size) is unchanged
+_bank_info_cache: dict[Path, tuple[int, int, MemoryBankInfo]] = {}
 
 
-def get_engine() -> HolographicReconstructionEngine:
-    """Get or create the reconstruction engine."""
-    global _engine
-    if _engine is None:
-        _engine = HolographicReconstructionEngine()
-    return _engine
+async def _spool_upload(file: UploadFile, job_id: str) -> str:
+    """
+    Stream an uploaded file to the upload directory, one chunk at a time.
+    Aborts with 413 once the file exceeds the upload limit.
+    """
+    upload_dir = Path(settings.upload_dir)
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    input_path = upload_dir / job_id
+
+    written = 0
+    async with aiofiles.open(input_path, "wb") as f:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            written += len(chunk)
+            if written > settings.max_upload_bytes:
+                break
+            await f.write(chunk)
+
+    if written > settings.max_upload_bytes:
+        input_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=413, detail="Upload too large")
+
+    return str(input_path)
 
 
 # ============================================================================
@@ -118,38 +140,43 @@ def get_engine() -> HolographicReconstructionEngine:
 @router.get("/health", response_model=HealthResponse)
 async def health_check() -> HealthResponse:
     """Health check endpoint."""
-    return HealthResponse(
+    return HealthResponse.model_construct(
         status="healthy",
         version=settings.app_version,
         deployment_tier=settings.deployment_tier.value,
     )
 
 
+# Presets never change at runtime, so the response body is encoded once
+_PRESETS: list[PresetInfo] = [
+    PresetInfo(
+        name="Enhance",
+        mode=ReconstructionMode.ENHANCE.value,
+        description="Improve image quality and clarity",
+    ),
+    PresetInfo(
+        name="Stylize",
+        mode=ReconstructionMode.STYLIZE.value,
+        description="Apply artistic style transformation",
+    ),
+    PresetInfo(
+        name="De-old Photo",
+        mode=ReconstructionMode.DE_OLD_PHOTO.value,
+        description="Restore and enhance old photographs",
+    ),
+    PresetInfo(
+        name="Make Anime",
+        mode=ReconstructionMode.MAKE_ANIME.value,
+        description="Transform to anime/illustration style",
+    ),
+]
+_PRESETS_JSON = orjson.dumps([preset.model_dump() for preset in _PRESETS])
+
+
 @router.get("/presets", response_model=list[PresetInfo])
-async def list_presets() -> list[PresetInfo]:
+async def list_presets() -> Response:
     """List available reconstruction presets."""
-    return [
-        PresetInfo(
-            name="Enhance",
-            mode=ReconstructionMode.ENHANCE.value,
-            description="Improve image quality and clarity",
-        ),
-        PresetInfo(
-            name="Stylize",
-            mode=ReconstructionMode.STYLIZE.value,
-            description="Apply artistic style transformation",
-        ),
-        PresetInfo(
-            name="De-old Photo",
-            mode=ReconstructionMode.DE_OLD_PHOTO.value,
-            description="Restore and enhance old photographs",
-        ),
-        PresetInfo(
-            name="Make Anime",
-            mode=ReconstructionMode.MAKE_ANIME.value,
-            description="Transform to anime/illustration style",
-        ),
-    ]
+    return Response(content=_PRESETS_JSON, media_type="application/json")
 
 
 # ============================================================================
@@ -157,7 +184,7 @@ async def list_presets() -> list[PresetInfo]:
 # ============================================================================
 
 
-@router.post("/upload", response_model=ProcessResponse)
+@router.post("/upload", response_model=ProcessResponse, status_code=202)
 async def upload_image(
     file: Annotated[UploadFile, File(description="Image file to process")],
     mode: ReconstructionMode = ReconstructionMode.ENHANCE,
@@ -171,16 +198,14 @@ async def upload_image(
 
     # Create job
     job_id = str(uuid4())
-    content = await file.read()
+    input_path = await _spool_upload(file, job_id)
 
-    # Store job info
-    jobs[job_id] = {
-        "status": "queued",
-        "progress": 0.0,
-        "mode": mode.value,
-        "input_data": content,
-        "result_data": None,
-    }
+    # Store job info and queue it for the workers
+    store = get_job_store()
+    await store.create_job(
+        job_id, mode=mode.value, input_path=input_path, content_type=file.content_type
+    )
+    await store.enqueue(job_id)
 
     logger.info(f"Created job {job_id} for {mode.value} processing")
 
@@ -188,44 +213,93 @@ async def upload_image(
         job_id=job_id,
         status="queued",
         message=f"Image queued for {mode.value} processing",
+        status_url=f"/api/v1/job/{job_id}",
+        stream_url=f"/api/v1/job/{job_id}/stream",
     )
 
 
 @router.get("/job/{job_id}", response_model=JobStatus)
 async def get_job_status(job_id: str) -> JobStatus:
     """Get the status of a processing job."""
-    if job_id not in jobs:
+    job = await get_job_store().get_job(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    job = jobs[job_id]
-    result_url = f"/api/v1/result/{job_id}" if job["status"] == "completed" else None
+    result_url = f"/api/v1/result/{job_id}" if job.status == "completed" else None
 
-    return JobStatus(
+    return JobStatus.model_construct(
         job_id=job_id,
-        status=job["status"],
-        progress=job["progress"],
+        status=job.status,
+        progress=job.progress,
         result_url=result_url,
     )
 
 
+def _terminal_event(job_id: str, status: str) -> dict:
+    """Final event for a finished job."""
+    if status == "completed":
+        return {"type": "completed", "job_id": job_id, "result_url": f"/api/v1/result/{job_id}"}
+    return {"type": "error", "job_id": job_id, "message": "Job failed"}
+
+
+def _sse_event(event: dict) -> dict:
+    """Wrap a job event for EventSourceResponse."""
+    return {"event": event["type"], "data": orjson.dumps(event).decode()}
+
+
+@router.get("/job/{job_id}/stream")
+async def stream_job(job_id: str) -> EventSourceResponse:
+    """
+    Stream job progress as Server-Sent Events.
+    Lightweight alternative to the WebSocket for status-only clients; the
+    stream ends with a ``completed`` or ``error`` event.
+    """
+    store = get_job_store()
+    job = await store.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_generator():
+        status = job.status
+        if status not in FINISHED_STATES:
+            # Subscribing inside the generator ties the subscription to the
+            # stream, so it is dropped however the stream ends
+            async with await store.subscribe(job_id) as events:
+                # Re-read the status once subscribed so the final event cannot slip past
+                current = await store.get_job(job_id)
+                status = current.status if current is not None else "failed"
+                if status not in FINISHED_STATES:
+                    async for event in events:
+                        if event["type"] == "completed":
+                            event = _terminal_event(job_id, "completed")
+                        yield _sse_event(event)
+                        if event["type"] in ("completed", "error"):
+                            return
+        # Nothing left to wait for, report the outcome right away
+        yield _sse_event(_terminal_event(job_id, status))
+
+    return EventSourceResponse(event_generator())
+
+
 @router.get("/result/{job_id}")
-async def get_result(job_id: str):
-    """Get the result of a completed job."""
-    if job_id not in jobs:
+async def get_result(job_id: str) -> Response:
+    """Get the result image of a completed job."""
+    store = get_job_store()
+    job = await store.get_job(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    job = jobs[job_id]
-    if job["status"] != "completed":
+    if job.status != "completed":
         raise HTTPException(status_code=400, detail="Job not completed")
 
-    if not job["result_data"]:
+    result_data = await store.get_result(job_id)
+    if not result_data:
         raise HTTPException(status_code=500, detail="Result data not available")
 
-    # Return base64 encoded result for simplicity
-    return {
-        "job_id": job_id,
-        "result": base64.b64encode(job["result_data"]).decode(),
-    }
+    return Response(
+        content=result_data,
+        media_type=job.result_content_type or "application/octet-stream",
+    )
 
 
 # ============================================================================
@@ -233,7 +307,7 @@ async def get_result(job_id: str):
 # ============================================================================
 
 
-@router.post("/batch")
+@router.post("/batch", status_code=202)
 async def start_batch(
     files: list[UploadFile],
     mode: ReconstructionMode = ReconstructionMode.ENHANCE,
@@ -245,23 +319,41 @@ async def start_batch(
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
 
+    store = get_job_store()
     batch_id = str(uuid4())
-    job_ids = []
+    images = [f for f in files if f.content_type and f.content_type.startswith("image/")]
+
+    # Spool the files concurrently, but only a bounded number at a time
+    limit = asyncio.Semaphore(settings.max_concurrent_uploads)
 
-    for file in files:
-        if file.content_type and file.content_type.startswith("image/"):
-            job_id = str(uuid4())
-            content = await file.read()
-            jobs[job_id] = {
-                "status": "queued",
-                "progress": 0.0,
-                "mode": mode.value,
-                "input_data": content,
-                "result_data": None,
-                "batch_id": batch_id,
-            }
-            job_ids.append(job_id)
+    async def ingest(file: UploadFile) -> tuple[str, str]:
+        job_id = str(uuid4())
+        async with limit:
+            return job_id, await _spool_upload(file, job_id)
 
+    spooled = await asyncio.gather(*map(ingest, images), return_exceptions=True)
+    errors = [r for r in spooled if isinstance(r, BaseException)]
+    if errors:
+        # Reject the whole batch rather than queue part of it
+        for result in spooled:
+            if not isinstance(result, BaseException):
+                Path(result[1]).unlink(missing_ok=True)
+        raise errors[0]
+
+    job_ids = []
+    for file, (job_id, input_path) in zip(images, spooled):
+        await store.create_job(
+            job_id,
+            mode=mode.value,
+            input_path=input_path,
+            batch_id=batch_id,
+            content_type=file.content_type,
+        )
+        job_ids.append(job_id)
+
+    await store.add_batch(batch_id, job_ids)
+    for job_id in job_ids:
+        await store.enqueue(job_id)
     logger.info(f"Created batch {batch_id} with {len(job_ids)} jobs")
 
     return {
@@ -269,24 +361,25 @@ async def start_batch(
         "job_count": len(job_ids),
         "job_ids": job_ids,
         "status": "queued",
+        "status_url": f"/api/v1/batch/{batch_id}",
     }
 
 
 @router.get("/batch/{batch_id}")
 async def get_batch_status(batch_id: str):
     """Get status of a batch processing job."""
-    batch_jobs = [j for j in jobs.values() if j.get("batch_id") == batch_id]
+    batch_jobs = await get_job_store().get_batch_jobs(batch_id)
 
     if not batch_jobs:
         raise HTTPException(status_code=404, detail="Batch not found")
 
-    completed = sum(1 for j in batch_jobs if j["status"] == "completed")
-    total_progress = sum(j["progress"] for j in batch_jobs) / len(batch_jobs)
+    completed = sum(1 for j in batch_jobs if j.status == "completed")
+    total_progress = sum(j.progress for j in batch_jobs) / len(batch_jobs)
 
     status = "processing"
     if completed == len(batch_jobs):
         status = "completed"
-    elif all(j["status"] == "queued" for j in batch_jobs):
+    elif all(j.status == "queued" for j in batch_jobs):
         status = "queued"
 
     return {
@@ -310,22 +403,43 @@ async def list_memory_banks() -> list[MemoryBankInfo]:
     if not presets_dir.exists():
         return []
 
-    banks = []
+    banks: dict[Path, MemoryBankInfo] = {}
+    to_load: dict[Path, tuple[int, int]] = {}
     for holo_file in presets_dir.glob("*.holo"):
         try:
-            bank = HolographicMemoryBank.load(holo_file)
-            banks.append(
-                MemoryBankInfo(
-                    name=bank.name,
-                    shard_count=len(bank.shards),
-                    scale_count=bank.scale_count,
-                    version=bank.version,
-                )
-            )
-        except Exception as e:
+            st = holo_file.stat()
+        except OSError as e:
             logger.warning(f"Failed to load memory bank {holo_file}: {e}")
-
-    return banks
+            continue
+        cached = _bank_info_cache.get(holo_file)
+        if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+            banks[holo_file] = cached[2]
+        else:
+            to_load[holo_file] = (st.st_mtime_ns, st.st_size)
+
+    # Parse changed files in worker threads, off the event loop
+    loaded = await asyncio.gather(
+        *(asyncio.to_thread(HolographicMemoryBank.load, f) for f in to_load),
+        return_exceptions=True,
+    )
+    for (holo_file, key), bank in zip(to_load.items(), loaded):
+        if isinstance(bank, Exception):
+            logger.warning(f"Failed to load memory bank {holo_file}: {bank}")
+            continue
+        info = MemoryBankInfo(
+            name=bank.name,
+            shard_count=bank.shard_count,
+            scale_count=bank.scale_count,
+            version=bank.version,
+        )
+        _bank_info_cache[holo_file] = (*key, info)
+        banks[holo_file] = info
+
+    # Forget banks whose files are gone
+    for stale in _bank_info_cache.keys() - banks.keys():
+        del _bank_info_cache[stale]
+
+    return list(banks.values())
 
 
 @router.post("/memory-banks/{name}/save")
@@ -337,7 +451,7 @@ async def save_memory_bank(name: str):
 
     engine.memory_bank.name = name
     save_path = presets_dir / f"{name}.holo"
-    engine.memory_bank.save(save_path)
+    await asyncio.to_thread(engine.memory_bank.save, save_path)
 
     return {"status": "saved", "path": str(save_path)}
 
@@ -352,12 +466,14 @@ async def load_memory_bank(name: str):
         raise HTTPException(status_code=404, detail="Memory bank not found")
 
     engine = get_engine()
-    engine.memory_bank = HolographicMemoryBank.load(load_path)
+    engine.memory_bank = await asyncio.to_thread(
+        HolographicMemoryBank.load, load_path, engine.parameters.max_shards
+    )
 
     return {
         "status": "loaded",
         "name": engine.memory_bank.name,
-        "shard_count": len(engine.memory_bank.shards),
+        "shard_count": engine.memory_bank.shard_count,
     }
 
 
@@ -402,21 +518,7 @@ async def update_dev_parameters(
     engine = get_engine()
 
     # Update only provided parameters
-    if request.tau_scale_1 is not None:
-        engine.parameters.tau_scale_1 = request.tau_scale_1
-    if request.tau_scale_2 is not None:
-        engine.parameters.tau_scale_2 = request.tau_scale_2
-    if request.tau_scale_3 is not None:
-        engine.parameters.tau_scale_3 = request.tau_scale_3
-    if request.tau_scale_4 is not None:
-        engine.parameters.tau_scale_4 = request.tau_scale_4
-    if request.cleanup_k_top is not None:
-        engine.parameters.cleanup_k_top = request.cleanup_k_top
-    if request.binding_temperature is not None:
-        engine.parameters.binding_temperature = request.binding_temperature
-    if request.binding_strength is not None:
-        engine.parameters.binding_strength = request.binding_strength
-    if request.cosine_threshold is not None:
-        engine.parameters.cosine_threshold = request.cosine_threshold
+    for key, value in request.model_dump(exclude_none=True).items():
+        setattr(engine.parameters, key, value)
 
     return {"status": "updated", "message": "Parameters updated successfully"}
@@ -5,77 +5,182 @@ Real-time bidirectional communication for live preview streaming
 and shard activation visualization.
 """
 import asyncio
-import json
+import base64
 import logging
+import struct
+from collections import defaultdict
 from dataclasses import asdict
+from pathlib import Path
 from typing import Any
 from uuid import uuid4
 
+import aiofiles
+import orjson
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
 
-from ..core.engine import (
-    HolographicReconstructionEngine,
-    ReconstructionMode,
-    ReconstructionProgress,
-)
+from ..config import settings
+from ..core.engine import ReconstructionMode, get_engine
 from ..core.self_healing import HealthStatus, SelfHealingWatchdog
+from ..services.job_store import FINISHED_STATES, JobRecord, Subscription, get_job_store
+from ..services.worker import ReconstructionWorker
+from .routes import DevParametersRequest
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+# Outgoing messages buffered per connection before the oldest are dropped
+SEND_QUEUE_SIZE = 32
+
+# How long a closing connection may take to flush its pending messages
+FLUSH_TIMEOUT_S = 1.0
+
+# Progress is sent as a binary frame: this header, the job id, then the packed
+# SHARD_RECORD shard activations. JSON frames always start with "{", so the
+# leading tag byte tells the two apart.
+PROGRESS_FRAME_TAG = 0x01
+# tag, step, total_steps, current_scale, active_shards, progress_percent, len(job_id)
+PROGRESS_FRAME_HEADER = struct.Struct("<BIIBHfB")
+
+
+def encode_progress_frame(event: dict) -> bytes:
+    """Encode a published progress event as a binary progress frame."""
+    job_id = event["job_id"].encode()
+    header = PROGRESS_FRAME_HEADER.pack(
+        PROGRESS_FRAME_TAG,
+        event["step"],
+        event["total_steps"],
+        event["current_scale"],
+        event["active_shards"],
+        event["progress_percent"],
+        len(job_id),
+    )
+    return b"".join((header, job_id, base64.b64decode(event["shard_activations"])))
+
+
 class ConnectionManager:
-    """Manages WebSocket connections for broadcasting updates."""
+    """
+    Manages WebSocket connections for broadcasting updates.
+
+    Every connection gets a bounded send queue drained by its own writer task,
+    so a slow client only delays its own messages, never other clients'.
+    Messages are encoded with orjson once and sent as binary JSON frames; a
+    broadcast shares the same encoded payload across all recipients. Progress
+    goes out as compact binary progress frames instead (see PROGRESS_FRAME_HEADER).
+    """
 
     def __init__(self):
         self.active_connections: dict[str, WebSocket] = {}
-        self.job_subscriptions: dict[str, set[str]] = {}  # job_id -> connection_ids
+        # job_id -> connection_ids, and the reverse index for disconnects
+        self.job_subscriptions: defaultdict[str, set[str]] = defaultdict(set)
+        self.conn_to_jobs: defaultdict[str, set[str]] = defaultdict(set)
+        self.send_queues: dict[str, asyncio.Queue] = {}
+        self._writers: dict[str, asyncio.Task] = {}
 
     async def connect(self, websocket: WebSocket) -> str:
         """Accept connection and return connection ID."""
         await websocket.accept()
         connection_id = str(uuid4())
         self.active_connections[connection_id] = websocket
+        queue: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.send_queues[connection_id] = queue
+        self._writers[connection_id] = asyncio.create_task(
+            self._writer(connection_id, websocket, queue)
+        )
         logger.info(f"WebSocket connected: {connection_id}")
         return connection_id
 
-    def disconnect(self, connection_id: str) -> None:
-        """Remove connection."""
+    async def disconnect(self, connection_id: str) -> None:
+        """Remove connection after flushing its pending messages."""
         if connection_id in self.active_connections:
             del self.active_connections[connection_id]
-            # Remove from all job subscriptions
-            for job_subs in self.job_subscriptions.values():
+            # Remove from this connection's job subscriptions
+            for job_id in self.conn_to_jobs.pop(connection_id, ()):
+                job_subs = self.job_subscriptions[job_id]
                 job_subs.discard(connection_id)
+                if not job_subs:
+                    del self.job_subscriptions[job_id]
+
+            self._enqueue(connection_id, None)
+            del self.send_queues[connection_id]
+            writer = self._writers.pop(connection_id)
+            _, pending = await asyncio.wait([writer], timeout=FLUSH_TIMEOUT_S)
+            for task in pending:
+                task.cancel()
             logger.info(f"WebSocket disconnected: {connection_id}")
 
+    async def _writer(
+        self, connection_id: str, websocket: WebSocket, queue: asyncio.Queue
+    ) -> None:
+        """Send queued payloads to one connection until told to stop."""
+        while (payload := await queue.get()) is not None:
+            try:
+                await websocket.send_bytes(payload)
+            except Exception as e:
+                logger.warning(f"Failed to send to {connection_id}: {e}")
+                break
+
+    def _enqueue(self, connection_id: str, payload: bytes | None) -> None:
+        """Queue a payload for a connection, dropping its oldest when full."""
+        queue = self.send_queues.get(connection_id)
+        if queue is None:
+            return
+        if queue.full():
+            queue.get_nowait()
+            logger.debug(f"Send queue full for {connection_id}, dropped oldest message")
+        queue.put_nowait(payload)
+
     def subscribe_to_job(self, connection_id: str, job_id: str) -> None:
         """Subscribe connection to job updates."""
-        if job_id not in self.job_subscriptions:
-            self.job_subscriptions[job_id] = set()
         self.job_subscriptions[job_id].add(connection_id)
+        self.conn_to_jobs[connection_id].add(job_id)
+
+    def unsubscribe_from_job(self, connection_id: str, job_id: str) -> None:
+        """Unsubscribe connection from job updates."""
+        job_subs = self.job_subscriptions.get(job_id)
+        if job_subs is not None:
+            job_subs.discard(connection_id)
+            if not job_subs:
+                del self.job_subscriptions[job_id]
+        conn_jobs = self.conn_to_jobs.get(connection_id)
+        if conn_jobs is not None:
+            conn_jobs.discard(job_id)
+            if not conn_jobs:
+                del self.conn_to_jobs[connection_id]
+
+    def has_subscribers(self, job_id: str) -> bool:
+        """Whether any connection is subscribed to a job."""
+        return bool(self.job_subscriptions.get(job_id))
 
     async def send_personal(self, connection_id: str, message: dict) -> None:
         """Send message to specific connection."""
-        if connection_id in self.active_connections:
-            await self.active_connections[connection_id].send_json(message)
+        if connection_id in self.send_queues:
+            self._enqueue(connection_id, orjson.dumps(message))
 
     async def broadcast_to_job(self, job_id: str, message: dict) -> None:
         """Broadcast message to all connections subscribed to a job."""
-        if job_id in self.job_subscriptions:
-            for conn_id in self.job_subscriptions[job_id]:
-                if conn_id in self.active_connections:
-                    try:
-                        await self.active_connections[conn_id].send_json(message)
-                    except Exception as e:
-                        logger.warning(f"Failed to send to {conn_id}: {e}")
+        subscribers = self.job_subscriptions.get(job_id)
+        if not subscribers:
+            return
+        self._broadcast_payload(subscribers, orjson.dumps(message))
+
+    async def broadcast_frame_to_job(self, job_id: str, frame: bytes) -> None:
+        """Broadcast an already encoded frame to a job's subscribers."""
+        subscribers = self.job_subscriptions.get(job_id)
+        if subscribers:
+            self._broadcast_payload(subscribers, frame)
+
+    def _broadcast_payload(self, connection_ids, payload: bytes) -> None:
+        """Queue one shared payload for several connections."""
+        for conn_id in connection_ids:
+            self._enqueue(conn_id, payload)
 
     async def broadcast_all(self, message: dict) -> None:
         """Broadcast to all connected clients."""
-        for conn_id, websocket in self.active_connections.items():
-            try:
-                await websocket.send_json(message)
-            except Exception as e:
-                logger.warning(f"Failed to broadcast to {conn_id}: {e}")
+        payload = orjson.dumps(message)
+        for conn_id in self.active_connections:
+            self._enqueue(conn_id, payload)
 
 
 # Global connection manager
@@ -83,7 +188,10 @@ manager = ConnectionManager()
 
 # Shared resources
 _watchdog: SelfHealingWatchdog | None = None
-_engine: HolographicReconstructionEngine | None = None
+_worker: ReconstructionWorker | None = None
+
+# Tasks relaying job events to subscribed connections (job_id -> task)
+_forward_tasks: dict[str, asyncio.Task] = {}
 
 
 def get_watchdog() -> SelfHealingWatchdog:
@@ -94,12 +202,12 @@ def get_watchdog() -> SelfHealingWatchdog:
     return _watchdog
 
 
-def get_engine() -> HolographicReconstructionEngine:
-    """Get or create engine instance."""
-    global _engine
-    if _engine is None:
-        _engine = HolographicReconstructionEngine()
-    return _engine
+def get_worker() -> ReconstructionWorker:
+    """Get or create the in-process reconstruction worker."""
+    global _worker
+    if _worker is None:
+        _worker = ReconstructionWorker(get_engine(), get_watchdog())
+    return _worker
 
 
 @router.websocket("/ws")
@@ -129,7 +237,7 @@ async def websocket_endpoint(websocket: WebSocket):
         while True:
             # Receive message
             data = await websocket.receive_text()
-            message = json.loads(data)
+            message = orjson.loads(data)
             msg_type = message.get("type", "")
 
             if msg_type == "subscribe":
@@ -137,10 +245,23 @@ async def websocket_endpoint(websocket: WebSocket):
                 job_id = message.get("job_id")
                 if job_id:
                     manager.subscribe_to_job(connection_id, job_id)
-                    await manager.send_personal(
-                        connection_id,
-                        {"type": "subscribed", "job_id": job_id},
-                    )
+                    job = await ensure_job_forwarding(job_id)
+                    if job is None:
+                        manager.unsubscribe_from_job(connection_id, job_id)
+                        await manager.send_personal(
+                            connection_id,
+                            {"type": "error", "message": f"Job not found: {job_id}"},
+                        )
+                    else:
+                        await manager.send_personal(
+                            connection_id,
+                            {"type": "subscribed", "job_id": job_id},
+                        )
+                        if job.status in FINISHED_STATES:
+                            # Nothing left to relay, report the outcome right away
+                            await manager.send_personal(
+                                connection_id, await job_outcome_event(job_id, job.status)
+                            )
 
             elif msg_type == "process":
                 # Start processing with live preview
@@ -165,22 +286,20 @@ async def websocket_endpoint(websocket: WebSocket):
                 )
 
     except WebSocketDisconnect:
-        manager.disconnect(connection_id)
-    except json.JSONDecodeError:
+        await manager.disconnect(connection_id)
+    except orjson.JSONDecodeError:
         await manager.send_personal(
             connection_id,
             {"type": "error", "message": "Invalid JSON"},
         )
-        manager.disconnect(connection_id)
+        await manager.disconnect(connection_id)
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
-        manager.disconnect(connection_id)
+        await manager.disconnect(connection_id)
 
 
 async def handle_process_request(connection_id: str, message: dict) -> None:
-    """Handle image processing request with live preview streaming."""
-    import base64
-
+    """Queue an image for processing and stream its progress back."""
     image_data = message.get("image_data")  # Base64 encoded
     mode_str = message.get("mode", "enhance")
 
@@ -206,7 +325,23 @@ async def handle_process_request(connection_id: str, message: dict) -> None:
         )
         return
 
+    # Same limit as the REST uploads
+    if len(image_bytes) > settings.max_upload_bytes:
+        await manager.send_personal(
+            connection_id,
+            {"type": "error", "message": "Upload too large"},
+        )
+        return
+
     job_id = str(uuid4())
+    store = get_job_store()
+
+    upload_dir = Path(settings.upload_dir)
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    input_path = upload_dir / job_id
+    async with aiofiles.open(input_path, "wb") as f:
+        await f.write(image_bytes)
+    await store.create_job(job_id, mode=mode.value, input_path=str(input_path))
 
     # Notify processing started
     await manager.send_personal(
@@ -218,70 +353,70 @@ async def handle_process_request(connection_id: str, message: dict) -> None:
         },
     )
 
-    # Subscribe to this job
+    # Subscribe to this job before it can start publishing
     manager.subscribe_to_job(connection_id, job_id)
+    await ensure_job_forwarding(job_id)
 
-    # Get engine and set up progress callback
-    engine = get_engine()
+    await store.enqueue(job_id)
 
-    async def progress_callback(progress: ReconstructionProgress):
-        """Stream progress updates to WebSocket."""
-        shard_data = [
-            {
-                "shard_id": s.shard_id,
-                "scale": s.scale,
-                "activation": s.activation,
-                "coordinates": s.coordinates,
-            }
-            for s in progress.shard_activations
-        ]
-
-        await manager.broadcast_to_job(
-            job_id,
-            {
-                "type": "progress",
-                "job_id": job_id,
-                "step": progress.step,
-                "total_steps": progress.total_steps,
-                "progress_percent": progress.progress_percent,
-                "current_scale": progress.current_scale,
-                "active_shards": progress.active_shards,
-                "shard_activations": shard_data,
-            },
-        )
 
-    # Wrap sync callback for async
-    def sync_progress_callback(progress: ReconstructionProgress):
-        asyncio.create_task(progress_callback(progress))
+async def ensure_job_forwarding(job_id: str) -> JobRecord | None:
+    """
+    Start relaying a job's events unless that is already happening.
+    Returns the job, or None if there is no such job. Nothing is relayed for
+    missing or finished jobs, since no more events will be published.
+    """
+    store = get_job_store()
+    if job_id in _forward_tasks:
+        return await store.get_job(job_id)
+
+    events = await store.subscribe(job_id)
+    # Read the job only once subscribed, so its final event cannot slip past
+    job = await store.get_job(job_id)
+    if job is None or job.status in FINISHED_STATES or job_id in _forward_tasks:
+        await events.aclose()
+        return job
+
+    task = asyncio.create_task(forward_job_events(job_id, events))
+    _forward_tasks[job_id] = task
+    task.add_done_callback(lambda _: _forward_tasks.pop(job_id, None))
+    return job
+
+
+async def job_outcome_event(job_id: str, status: str) -> dict:
+    """Final event of a finished job, carrying the result when it completed."""
+    if status != "completed":
+        return {"type": "error", "job_id": job_id, "message": "Job failed"}
+    result = await get_job_store().get_result(job_id)
+    return {
+        "type": "completed",
+        "job_id": job_id,
+        "result": base64.b64encode(result or b"").decode(),
+    }
+
+
+async def forward_job_events(job_id: str, events: Subscription) -> None:
+    """Relay a job's published events to its subscribed connections."""
+    try:
+        async for event in events:
+            if not manager.has_subscribers(job_id):
+                # Everyone left; dropping the subscription lets the worker
+                # skip building progress events for this job
+                break
 
-    engine.set_progress_callback(sync_progress_callback)
+            if event["type"] == "progress":
+                await manager.broadcast_frame_to_job(job_id, encode_progress_frame(event))
+                continue
 
-    # Process image
-    try:
-        result = await engine.reconstruct(image_bytes, mode)
+            if event["type"] == "completed":
+                event = await job_outcome_event(job_id, "completed")
 
-        # Send completion
-        await manager.broadcast_to_job(
-            job_id,
-            {
-                "type": "completed",
-                "job_id": job_id,
-                "result": base64.b64encode(result).decode(),
-            },
-        )
-    except Exception as e:
-        logger.error(f"Processing error: {e}")
-        watchdog = get_watchdog()
-        watchdog.handle_error(e)
+            await manager.broadcast_to_job(job_id, event)
 
-        await manager.broadcast_to_job(
-            job_id,
-            {
-                "type": "error",
-                "job_id": job_id,
-                "message": str(e),
-            },
-        )
+            if event["type"] in ("completed", "error"):
+                break
+    finally:
+        await events.aclose()
 
 
 async def handle_health_request(connection_id: str) -> None:
@@ -329,10 +464,18 @@ async def handle_dev_params(connection_id: str, message: dict) -> None:
             },
         )
     elif action == "set":
-        params_update = message.get("params", {})
-        for key, value in params_update.items():
-            if hasattr(engine.parameters, key):
-                setattr(engine.parameters, key, value)
+        # Only fields of DevParametersRequest can be set, validated like the REST route
+        try:
+            params_update = DevParametersRequest.model_validate(message.get("params", {}))
+        except ValidationError as e:
+            await manager.send_personal(
+                connection_id,
+                {"type": "error", "message": f"Invalid parameters: {e.error_count()} errors"},
+            )
+            return
+
+        for key, value in params_update.model_dump(exclude_none=True).items():
+            setattr(engine.parameters, key, value)
 
         await manager.send_personal(
             connection_id,
@@ -28,6 +28,7 @@ class Settings(BaseSettings):
     # Server settings
     host: str = "0.0.0.0"
     port: int = 8000
+    ws_per_message_deflate: bool = True  # compress WebSocket frames
 
     # CORS settings
     cors_origins: list[str] = ["http://localhost:5173", "http://localhost:1420", "tauri://localhost"]
@@ -44,6 +45,15 @@ class Settings(BaseSettings):
     upload_dir: str = "./uploads"
     checkpoint_dir: str = "./checkpoints"
     holo_presets_dir: str = "./presets"
+    max_upload_bytes: int = 100 * 1024 * 1024  # largest accepted request body
+    max_concurrent_uploads: int = 8  # batch files spooled to disk at once
+
+    # Job store (in-process unless a Redis URL is configured)
+    redis_url: str | None = None
+    job_ttl_s: int = 3600
+    job_sweep_interval_s: float = 60.0
+    max_jobs: int = 10000  # in-memory store only; oldest jobs evicted beyond this
+    embedded_worker: bool = True  # run a reconstruction worker in the API process
 
     class Config:
         env_prefix = "PIC2PIC_"
@@ -7,15 +7,64 @@ shard binding with liquid-time gating.
 This module provides the heart of pic2pic-nextgen's image transformation
 capabilities.
 """
+import asyncio
+import copy
 import logging
+import math
+import time
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
 from typing import Callable
 
+import numpy as np
+import orjson
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; kernels then run as plain Python
+    njit = None
+
 logger = logging.getLogger(__name__)
 
 
+def _fill_step_block(
+    step_scales: np.ndarray,
+    step_levels: np.ndarray,
+    scales: np.ndarray,
+    activations: np.ndarray,
+) -> None:
+    """
+    Fill the shard scales and activations of a block of consecutive steps.
+    Row j of ``scales``/``activations`` gets the scale and activation level
+    of step j of the block.
+    """
+    for j in range(step_scales.shape[0]):
+        scale = step_scales[j]
+        level = step_levels[j]
+        for i in range(scales.shape[1]):
+            scales[j, i] = scale
+            activations[j, i] = level
+
+
+if njit is not None:
+    _fill_step_block = njit(cache=True, fastmath=True)(_fill_step_block)
+
+
+def warm_up_kernels() -> None:
+    """
+    Compile (or load from cache) the JIT kernels ahead of the first run.
+    Compiling takes a noticeable fraction of a second and blocks the caller,
+    so call this from a worker thread rather than the event loop.
+    """
+    _fill_step_block(
+        np.zeros(1, dtype=np.uint8),
+        np.zeros(1, dtype=np.float32),
+        np.empty((1, 1), dtype=np.uint8),
+        np.empty((1, 1), dtype=np.float32),
+    )
+
+
 class ReconstructionMode(str, Enum):
     """Available reconstruction modes for different use cases."""
 
@@ -26,7 +75,7 @@ class ReconstructionMode(str, Enum):
     CUSTOM = "custom"
 
 
-@dataclass
+@dataclass(slots=True)
 class HolographicParameters:
     """
     Parameters controlling the holographic reconstruction process.
@@ -50,37 +99,44 @@ class HolographicParameters:
 
     @classmethod
     def from_preset(cls, mode: ReconstructionMode) -> "HolographicParameters":
-        """Create parameters from a preset mode."""
-        presets = {
-            ReconstructionMode.ENHANCE: cls(
-                tau_scale_1=0.15,
-                tau_scale_2=0.25,
-                binding_strength=0.9,
-            ),
-            ReconstructionMode.STYLIZE: cls(
-                tau_scale_1=0.2,
-                tau_scale_2=0.3,
-                tau_scale_3=0.4,
-                binding_temperature=1.5,
-            ),
-            ReconstructionMode.DE_OLD_PHOTO: cls(
-                tau_scale_1=0.1,
-                tau_scale_2=0.15,
-                cleanup_k_top=30,
-                binding_strength=0.95,
-            ),
-            ReconstructionMode.MAKE_ANIME: cls(
-                tau_scale_1=0.25,
-                tau_scale_2=0.35,
-                tau_scale_3=0.45,
-                binding_temperature=2.0,
-            ),
-            ReconstructionMode.CUSTOM: cls(),
-        }
-        return presets.get(mode, cls())
-
-
-@dataclass
+        """
+        Create parameters from a preset mode.
+        Returns a copy, so callers may tune it without touching the preset.
+        """
+        preset = _PRESETS.get(mode)
+        return copy.copy(preset) if preset is not None else cls()
+
+
+# Preset parameters, built once; from_preset hands out copies
+_PRESETS: dict[ReconstructionMode, HolographicParameters] = {
+    ReconstructionMode.ENHANCE: HolographicParameters(
+        tau_scale_1=0.15,
+        tau_scale_2=0.25,
+        binding_strength=0.9,
+    ),
+    ReconstructionMode.STYLIZE: HolographicParameters(
+        tau_scale_1=0.2,
+        tau_scale_2=0.3,
+        tau_scale_3=0.4,
+        binding_temperature=1.5,
+    ),
+    ReconstructionMode.DE_OLD_PHOTO: HolographicParameters(
+        tau_scale_1=0.1,
+        tau_scale_2=0.15,
+        cleanup_k_top=30,
+        binding_strength=0.95,
+    ),
+    ReconstructionMode.MAKE_ANIME: HolographicParameters(
+        tau_scale_1=0.25,
+        tau_scale_2=0.35,
+        tau_scale_3=0.45,
+        binding_temperature=2.0,
+    ),
+    ReconstructionMode.CUSTOM: HolographicParameters(),
+}
+
+
+@dataclass(slots=True, frozen=True)
 class ShardActivation:
     """Represents activation state of a memory shard."""
 
@@ -90,7 +146,53 @@ class ShardActivation:
     coordinates: tuple[int, int]
 
 
-@dataclass
+@dataclass(slots=True, frozen=True, eq=False)
+class ShardActivationBatch:
+    """
+    Activation state of a group of shards, one array per field.
+    ShardActivation objects are only built when the batch is iterated.
+    Batches compare by array contents and are unhashable, like their arrays.
+    """
+
+    shard_ids: np.ndarray  # int32
+    scales: np.ndarray  # uint8
+    activations: np.ndarray  # float32
+    coordinates: np.ndarray  # (n, 2) int32
+
+    @classmethod
+    def empty(cls) -> "ShardActivationBatch":
+        """Batch with no shards."""
+        return cls(
+            shard_ids=np.empty(0, dtype=np.int32),
+            scales=np.empty(0, dtype=np.uint8),
+            activations=np.empty(0, dtype=np.float32),
+            coordinates=np.empty((0, 2), dtype=np.int32),
+        )
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ShardActivationBatch):
+            return NotImplemented
+        return (
+            np.array_equal(self.shard_ids, other.shard_ids)
+            and np.array_equal(self.scales, other.scales)
+            and np.array_equal(self.activations, other.activations)
+            and np.array_equal(self.coordinates, other.coordinates)
+        )
+
+    def __len__(self) -> int:
+        return len(self.shard_ids)
+
+    def __iter__(self):
+        for shard_id, scale, activation, (x, y) in zip(
+            self.shard_ids.tolist(),
+            self.scales.tolist(),
+            self.activations.tolist(),
+            self.coordinates.tolist(),
+        ):
+            yield ShardActivation(shard_id, scale, activation, (x, y))
+
+
+@dataclass(slots=True, frozen=True)
 class ReconstructionProgress:
     """Progress update during reconstruction."""
 
@@ -99,7 +201,7 @@ class ReconstructionProgress:
     current_scale: int
     active_shards: int
     preview_data: bytes | None = None
-    shard_activations: list[ShardActivation] = field(default_factory=list)
+    shard_activations: ShardActivationBatch = field(default_factory=ShardActivationBatch.empty)
 
     @property
     def progress_percent(self) -> float:
@@ -113,95 +215,385 @@ class HolographicMemoryBank:
     """
     Memory bank storing holographic reconstruction patterns.
     Can be saved/loaded as .holo files.
+
+    Shards are kept struct-of-arrays: ids and activations live in contiguous
+    NumPy arrays (grown by doubling), so cleanup is a single vectorized pass.
+    Activations are in [0, 1] and stored quantized to uint8 (steps of 1/255),
+    well within the precision cleanup thresholds need.
+    Shards may carry an ``embedding``; embeddings are stacked into one matrix
+    with their squared norms precomputed. Any other shard fields are kept per
+    row alongside.
+
+    The bank holds at most ``max_shards`` shards. Adding a new shard to a full
+    bank first evicts the lowest-activation shards, EVICT_FRACTION of the cap
+    at once, so eviction costs amortized O(1) per added shard.
     """
 
-    def __init__(self, name: str = "default"):
+    INITIAL_CAPACITY = 64
+
+    # Quantization levels of stored activations
+    ACTIVATION_LEVELS = 255
+
+    # Share of max_shards evicted together when a full bank takes a new shard
+    EVICT_FRACTION = 1 / 16
+
+    # Rows per similarity matrix block, bounding its memory to BLOCK x shard_count
+    SIMILARITY_BLOCK = 1024
+
+    def __init__(self, name: str = "default", max_shards: int = 10000):
         self.name = name
-        self.shards: dict[int, dict] = {}
+        self.max_shards = max_shards
         self.scale_count = 4
         self.version = "2.0.0"
+        self._n = 0
+        self._ids = np.empty(self.INITIAL_CAPACITY, dtype=np.int64)
+        self._activations = np.empty(self.INITIAL_CAPACITY, dtype=np.uint8)  # quantized
+        self._embeddings: np.ndarray | None = None  # (capacity, dim), once known
+        self._sq_norms = np.zeros(self.INITIAL_CAPACITY, dtype=np.float32)  # 0: none
+        self._fields: list[dict] = []  # remaining shard data, by row
+        self._rows: dict[int, int] = {}  # shard_id -> row
+
+    @property
+    def shard_count(self) -> int:
+        """Number of shards in the bank."""
+        return self._n
+
+    @property
+    def shards(self) -> dict[int, dict]:
+        """Snapshot of all shards as {shard_id: shard_data}."""
+        return {sid: self.get_shard(sid) for sid in self._ids[: self._n].tolist()}
+
+    def _grow(self) -> None:
+        """Double the capacity of the shard arrays."""
+        capacity = 2 * len(self._ids)
+        self._ids = np.resize(self._ids, capacity)
+        self._activations = np.resize(self._activations, capacity)
+        self._sq_norms = np.resize(self._sq_norms, capacity)
+        if self._embeddings is not None:
+            self._embeddings = np.resize(self._embeddings, (capacity, self._embeddings.shape[1]))
+
+    def _set_embedding(self, row: int, embedding) -> None:
+        """Store a shard's embedding and its squared norm."""
+        embedding = np.asarray(embedding, dtype=np.float32)
+        if self._embeddings is None:
+            self._embeddings = np.zeros((len(self._ids), len(embedding)), dtype=np.float32)
+        elif embedding.shape != self._embeddings.shape[1:]:
+            raise ValueError(
+                f"Embedding has shape {embedding.shape}, "
+                f"bank expects ({self._embeddings.shape[1]},)"
+            )
+        self._embeddings[row] = embedding
+        self._sq_norms[row] = embedding @ embedding
 
     def add_shard(self, shard_id: int, shard_data: dict) -> None:
         """Add a shard to the memory bank."""
-        self.shards[shard_id] = shard_data
-        logger.debug(f"Added shard {shard_id}, total shards: {len(self.shards)}")
+        fields = dict(shard_data)
+        activation = fields.pop("activation", 1.0)
+        embedding = fields.pop("embedding", None)
+        # NaN passes the clamp below unchanged and has no uint8 level
+        if math.isnan(activation):
+            raise ValueError(f"Shard {shard_id} has a NaN activation")
+
+        row = self._rows.get(shard_id)
+        if row is None:
+            if self._n >= self.max_shards:
+                self._evict_least_active()
+            if self._n == len(self._ids):
+                self._grow()
+            row = self._n
+            self._n += 1
+            self._rows[shard_id] = row
+            self._ids[row] = shard_id
+            self._fields.append(fields)
+        else:
+            self._fields[row] = fields
+        self._activations[row] = round(min(max(activation, 0.0), 1.0) * self.ACTIVATION_LEVELS)
+        if embedding is not None:
+            self._set_embedding(row, embedding)
+        else:
+            self._sq_norms[row] = 0.0
+        logger.debug(f"Added shard {shard_id}, total shards: {self._n}")
 
     def get_shard(self, shard_id: int) -> dict | None:
         """Retrieve a shard from the memory bank."""
-        return self.shards.get(shard_id)
+        row = self._rows.get(shard_id)
+        if row is None:
+            return None
+        shard = {**self._fields[row], "activation": int(self._activations[row]) / self.ACTIVATION_LEVELS}
+        if self._sq_norms[row] > 0:
+            shard["embedding"] = self._embeddings[row].copy()
+        return shard
+
+    def _compact(self, keep: np.ndarray) -> int:
+        """Keep only the given rows (ascending). Returns number of shards removed."""
+        removed = self._n - len(keep)
+        if removed > 0:
+            kept = len(keep)
+            self._ids[:kept] = self._ids[keep]
+            self._activations[:kept] = self._activations[keep]
+            self._sq_norms[:kept] = self._sq_norms[keep]
+            if self._embeddings is not None:
+                self._embeddings[:kept] = self._embeddings[keep]
+            self._fields = [self._fields[row] for row in keep.tolist()]
+            self._n = kept
+            self._rows = dict(zip(self._ids[:kept].tolist(), range(kept)))
+        return removed
+
+    def _evict_least_active(self) -> int:
+        """Make room by evicting the lowest-activation shards. Returns number removed."""
+        count = min(self._n, max(1, int(self.max_shards * self.EVICT_FRACTION)))
+        least = np.argpartition(self._activations[: self._n], count - 1)[:count]
+        keep = np.ones(self._n, dtype=bool)
+        keep[least] = False
+        removed = self._compact(np.flatnonzero(keep))
+        logger.debug(f"Evicted {removed} least active shards")
+        return removed
 
     def cleanup_low_activation_shards(self, threshold: float = 0.92) -> int:
         """
         Remove shards with activation below cosine threshold.
         Returns number of shards removed.
         """
-        initial_count = len(self.shards)
-        self.shards = {
-            sid: data
-            for sid, data in self.shards.items()
-            if data.get("activation", 1.0) >= threshold
-        }
-        removed = initial_count - len(self.shards)
+        # Compared on the quantized levels; a shard right at the threshold is kept
+        min_level = round(threshold * self.ACTIVATION_LEVELS)
+        removed = self._compact(np.flatnonzero(self._activations[: self._n] >= min_level))
         if removed > 0:
             logger.info(f"Cleaned up {removed} low-activation shards")
         return removed
 
+    def cleanup_dissimilar_shards(self, reference, threshold: float = 0.92) -> int:
+        """
+        Remove shards whose embedding has cosine similarity below threshold
+        with a reference embedding. Shards without an embedding are kept.
+        Returns number of shards removed.
+
+        Compares squared terms, (a.b)^2 >= t^2 |a|^2 |b|^2 with a.b >= 0, so
+        no square roots are taken.
+        """
+        if self._embeddings is None or self._n == 0:
+            return 0
+
+        reference = np.asarray(reference, dtype=np.float32)
+        sq_norms = self._sq_norms[: self._n]
+        dots = self._embeddings[: self._n] @ reference
+        similar = (dots >= 0) & (
+            dots * dots >= (threshold * threshold) * sq_norms * (reference @ reference)
+        )
+        removed = self._compact(np.flatnonzero(similar | (sq_norms == 0)))
+        if removed > 0:
+            logger.info(f"Cleaned up {removed} dissimilar shards")
+        return removed
+
+    def incoherent_shards(self, threshold: float = 0.92) -> list[int]:
+        """
+        Ids of shards whose embedding has cosine similarity below threshold
+        with the embedding of every other shard. Shards without an embedding
+        are not checked.
+
+        Embeddings are normalized once and compared in SIMILARITY_BLOCK row
+        blocks, one matrix product each.
+        """
+        if self._embeddings is None:
+            return []
+        rows = np.flatnonzero(self._sq_norms[: self._n] > 0)
+        if len(rows) < 2:
+            return []
+
+        unit = self._embeddings[rows] / np.sqrt(self._sq_norms[rows])[:, None]
+        best = np.empty(len(rows), dtype=np.float32)
+        for start in range(0, len(rows), self.SIMILARITY_BLOCK):
+            similarity = unit[start : start + self.SIMILARITY_BLOCK] @ unit.T
+            block = np.arange(len(similarity))
+            similarity[block, start + block] = -np.inf  # not compared with itself
+            best[start : start + len(similarity)] = similarity.max(axis=1)
+        return self._ids[rows[best < threshold]].tolist()
+
     def save(self, path: Path) -> None:
-        """Save memory bank to .holo file."""
-        import json
-
-        data = {
-            "name": self.name,
-            "version": self.version,
-            "scale_count": self.scale_count,
-            "shards": self.shards,
+        """
+        Save memory bank to .holo file.
+
+        The file is a compressed NumPy archive holding the shard arrays as
+        they are, so no number is formatted as text. Bank metadata and the
+        remaining shard fields are embedded as JSON byte arrays, which keeps
+        the archive loadable without pickle.
+        """
+        n = self._n
+        meta = {"name": self.name, "version": self.version, "scale_count": self.scale_count}
+        arrays = {
+            "meta": np.frombuffer(
+                orjson.dumps(meta, option=orjson.OPT_NON_STR_KEYS), dtype=np.uint8
+            ),
+            "ids": self._ids[:n],
+            "activations": self._activations[:n],
+            # User-supplied fields may use non-str keys; they load back as strings
+            "fields": np.frombuffer(
+                orjson.dumps(
+                    self._fields,
+                    option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+                ),
+                dtype=np.uint8,
+            ),
         }
-        with open(path, "w") as f:
-            json.dump(data, f)
+        if self._embeddings is not None:
+            arrays["embeddings"] = self._embeddings[:n]
+            arrays["sq_norms"] = self._sq_norms[:n]
+        # Writing to a file object keeps numpy from appending ".npz"
+        with open(path, "wb") as f:
+            np.savez_compressed(f, **arrays)
         logger.info(f"Saved memory bank to {path}")
 
     @classmethod
-    def load(cls, path: Path) -> "HolographicMemoryBank":
-        """Load memory bank from .holo file."""
-        import json
+    def load(cls, path: Path, max_shards: int = 10000) -> "HolographicMemoryBank":
+        """
+        Load memory bank from .holo file (NumPy archive, or legacy JSON).
+        Files holding more than ``max_shards`` shards keep only the most active.
+        """
+        with open(path, "rb") as f:
+            if f.read(len(_NPZ_MAGIC)) == _NPZ_MAGIC:
+                f.seek(0)
+                with np.load(f) as data:
+                    bank = cls._from_arrays(data, max_shards)
+            else:
+                f.seek(0)
+                bank = cls._from_json(orjson.loads(f.read()), max_shards)
+        logger.info(f"Loaded memory bank from {path} with {bank.shard_count} shards")
+        return bank
+
+    @classmethod
+    def _from_arrays(cls, data, max_shards: int) -> "HolographicMemoryBank":
+        """Build a bank from the arrays of a saved archive."""
+        meta = orjson.loads(data["meta"].tobytes())
+        bank = cls(name=meta.get("name", "loaded"), max_shards=max_shards)
+        bank.version = meta.get("version", "1.0.0")
+        bank.scale_count = meta.get("scale_count", 4)
+
+        ids = data["ids"]
+        n = len(ids)
+        capacity = max(cls.INITIAL_CAPACITY, n)
+        bank._ids = np.resize(ids.astype(np.int64), capacity)
+        bank._activations = np.resize(data["activations"].astype(np.uint8), capacity)
+        bank._sq_norms = np.zeros(capacity, dtype=np.float32)
+        if "embeddings" in data:
+            embeddings = data["embeddings"]
+            bank._embeddings = np.zeros((capacity, embeddings.shape[1]), dtype=np.float32)
+            bank._embeddings[:n] = embeddings
+            bank._sq_norms[:n] = data["sq_norms"]
+        bank._fields = orjson.loads(data["fields"].tobytes())
+        bank._n = n
+        bank._rows = dict(zip(ids.tolist(), range(n)))
+
+        if n > bank.max_shards:
+            _warn_truncated(bank, n)
+            most_active = np.argpartition(bank._activations[:n], n - bank.max_shards)
+            bank._compact(np.sort(most_active[n - bank.max_shards:]))
+        return bank
 
-        with open(path, "r") as f:
-            data = json.load(f)
-        bank = cls(name=data.get("name", "loaded"))
+    @classmethod
+    def _from_json(cls, data: dict, max_shards: int) -> "HolographicMemoryBank":
+        """Build a bank from a JSON .holo file written before the archive format."""
+        bank = cls(name=data.get("name", "loaded"), max_shards=max_shards)
         bank.version = data.get("version", "1.0.0")
         bank.scale_count = data.get("scale_count", 4)
-        bank.shards = data.get("shards", {})
-        logger.info(f"Loaded memory bank from {path} with {len(bank.shards)} shards")
+        shards = data.get("shards", {})
+        if len(shards) > max_shards:
+            _warn_truncated(bank, len(shards))
+        for shard_id, shard_data in shards.items():
+            bank.add_shard(int(shard_id), shard_data)
         return bank
 
 
+def _warn_truncated(bank: HolographicMemoryBank, stored: int) -> None:
+    """Log that a loaded bank does not fit its shard cap."""
+    logger.warning(
+        f"Memory bank '{bank.name}' holds {stored} shards but max_shards is "
+        f"{bank.max_shards}; evicting the {stored - bank.max_shards} least active"
+    )
+
+
+# Leading bytes of a .npz archive (a zip file)
+_NPZ_MAGIC = b"PK\x03\x04"
+
+
 class HolographicReconstructionEngine:
     """
     Main engine for holographic image reconstruction.
     Provides real-time streaming preview with liquid-time gating visualization.
     """
 
+    # Shards reported per progress step
+    MAX_ACTIVE_SHARDS = 10
+
+    # Items buffered between reconstruction pipeline stages
+    PIPELINE_DEPTH = 2
+
+    # Steps computed per kernel call; their progress updates are emitted together
+    STEP_BLOCK = 5
+
     def __init__(
         self,
         memory_bank: HolographicMemoryBank | None = None,
         parameters: HolographicParameters | None = None,
     ):
-        self.memory_bank = memory_bank or HolographicMemoryBank()
         self.parameters = parameters or HolographicParameters()
+        self.memory_bank = memory_bank or HolographicMemoryBank(
+            max_shards=self.parameters.max_shards
+        )
         self.operation_count = 0
         self._progress_callback: Callable[[ReconstructionProgress], None] | None = None
+        self._progress_min_interval = 0.0
+        self._last_progress_at = -math.inf  # time.monotonic() of the last delivery
+        # Newest throttled update, delivered once the interval is over
+        self._pending_progress: ReconstructionProgress | None = None
+        self._pending_flush: asyncio.TimerHandle | None = None
 
     def set_progress_callback(
-        self, callback: Callable[[ReconstructionProgress], None]
+        self,
+        callback: Callable[[ReconstructionProgress], None],
+        min_interval: float = 0.0,
     ) -> None:
-        """Set callback for progress updates during reconstruction."""
+        """
+        Set callback for progress updates during reconstruction.
+        Updates following the last delivered one by less than min_interval
+        seconds are held back, and the newest of them is delivered when the
+        interval is over; the first and final step are delivered at once.
+        """
         self._progress_callback = callback
+        self._progress_min_interval = min_interval
 
     def _emit_progress(self, progress: ReconstructionProgress) -> None:
         """Emit progress update if callback is set."""
-        if self._progress_callback:
+        if self._progress_callback is None:
+            return
+        if self._progress_min_interval:
+            now = time.monotonic()
+            wait = self._last_progress_at + self._progress_min_interval - now
+            if progress.step < progress.total_steps and wait > 0:
+                self._pending_progress = progress
+                if self._pending_flush is None:
+                    self._pending_flush = asyncio.get_running_loop().call_later(
+                        wait, self._flush_progress
+                    )
+                return
+            self._cancel_pending_progress()
+            self._last_progress_at = now
+        self._progress_callback(progress)
+
+    def _flush_progress(self) -> None:
+        """Deliver the newest update held back by the throttle."""
+        progress = self._pending_progress
+        self._pending_flush = None
+        self._pending_progress = None
+        if progress is not None and self._progress_callback is not None:
+            self._last_progress_at = time.monotonic()
             self._progress_callback(progress)
 
+    def _cancel_pending_progress(self) -> None:
+        """Drop a held back update, e.g. once a newer one is delivered."""
+        if self._pending_flush is not None:
+            self._pending_flush.cancel()
+        self._pending_flush = None
+        self._pending_progress = None
+
     async def reconstruct(
         self,
         input_image: bytes,
@@ -217,48 +609,99 @@ class HolographicReconstructionEngine:
         Returns:
             Reconstructed image bytes
         """
-        import asyncio
-
         # Use preset parameters for non-custom modes
         if mode != ReconstructionMode.CUSTOM:
             self.parameters = HolographicParameters.from_preset(mode)
 
         total_steps = self.parameters.cleanup_k_top
+        self._last_progress_at = -math.inf
         logger.info(f"Starting reconstruction in {mode.value} mode")
 
-        # Simulate multi-scale reconstruction with progress updates
-        for step in range(total_steps):
-            current_scale = (step % self.memory_bank.scale_count) + 1
-
-            # Create progress update with shard activations
-            activations = [
-                ShardActivation(
-                    shard_id=i,
-                    scale=current_scale,
-                    activation=0.5 + (step / total_steps) * 0.5,
-                    coordinates=(i % 64, i // 64),
-                )
-                for i in range(min(10, step + 1))
-            ]
-
-            progress = ReconstructionProgress(
-                step=step + 1,
-                total_steps=total_steps,
-                current_scale=current_scale,
-                active_shards=len(activations),
-                shard_activations=activations,
-            )
-            self._emit_progress(progress)
-
-            # Simulate processing time
-            await asyncio.sleep(0.05)
-
-            self.operation_count += 1
+        # Stages run concurrently, handing work on through bounded queues
+        steps: asyncio.Queue[tuple[int, int] | None] = asyncio.Queue(self.PIPELINE_DEPTH)
+        updates: asyncio.Queue[ReconstructionProgress | None] = asyncio.Queue(
+            self.PIPELINE_DEPTH
+        )
+        stages = [
+            asyncio.create_task(self._compute_stage(total_steps, steps)),
+            asyncio.create_task(self._activation_stage(total_steps, steps, updates)),
+            asyncio.create_task(self._emit_stage(updates)),
+        ]
+        try:
+            await asyncio.gather(*stages)
+        finally:
+            # A failed stage must not leave the others waiting on their queues
+            for stage in stages:
+                stage.cancel()
+            self._cancel_pending_progress()
 
         # Return placeholder reconstructed image (in production, actual processing)
         logger.info(f"Reconstruction complete, operation count: {self.operation_count}")
         return input_image
 
+    async def _compute_stage(self, total_steps: int, steps: asyncio.Queue) -> None:
+        """Pipeline stage: run the steps in blocks, passing (start_step, n_steps) on."""
+        # Simulate multi-scale reconstruction
+        for start_step in range(0, total_steps, self.STEP_BLOCK):
+            n_steps = min(self.STEP_BLOCK, total_steps - start_step)
+
+            # Simulate processing time
+            await asyncio.sleep(0.05 * n_steps)
+
+            self.operation_count += n_steps
+            await steps.put((start_step, n_steps))
+        await steps.put(None)
+
+    async def _activation_stage(
+        self, total_steps: int, steps: asyncio.Queue, updates: asyncio.Queue
+    ) -> None:
+        """Pipeline stage: build the progress updates for each finished block."""
+        # Shard ids and their grid coordinates are fixed; steps share read-only views
+        shard_ids = np.arange(self.MAX_ACTIVE_SHARDS, dtype=np.int32)
+        coordinates = np.stack([shard_ids & 63, shard_ids >> 6], axis=1)
+        shard_ids.flags.writeable = False
+        coordinates.flags.writeable = False
+
+        # Scale and activation level of every step, computed once per run
+        all_steps = np.arange(total_steps)
+        scale_lut = (all_steps % self.memory_bank.scale_count + 1).astype(np.uint8)
+        level_lut = (0.5 + all_steps * (0.5 / max(total_steps, 1))).astype(np.float32)
+
+        while (item := await steps.get()) is not None:
+            start_step, n_steps = item
+            block = slice(start_step, start_step + n_steps)
+            step_scales = scale_lut[block]
+
+            # One kernel call fills the whole block; steps get row views of it
+            scales = np.empty((n_steps, self.MAX_ACTIVE_SHARDS), dtype=np.uint8)
+            levels = np.empty((n_steps, self.MAX_ACTIVE_SHARDS), dtype=np.float32)
+            _fill_step_block(step_scales, level_lut[block], scales, levels)
+
+            for j, current_scale in enumerate(step_scales.tolist()):
+                step = start_step + j
+                n = min(self.MAX_ACTIVE_SHARDS, step + 1)
+                activations = ShardActivationBatch(
+                    shard_ids=shard_ids[:n],
+                    scales=scales[j, :n],
+                    activations=levels[j, :n],
+                    coordinates=coordinates[:n],
+                )
+                await updates.put(
+                    ReconstructionProgress(
+                        step=step + 1,
+                        total_steps=total_steps,
+                        current_scale=current_scale,
+                        active_shards=n,
+                        shard_activations=activations,
+                    )
+                )
+        await updates.put(None)
+
+    async def _emit_stage(self, updates: asyncio.Queue) -> None:
+        """Pipeline stage: hand progress updates to the callback."""
+        while (progress := await updates.get()) is not None:
+            self._emit_progress(progress)
+
     def should_run_integrity_check(self, interval: int = 1000) -> bool:
         """Check if integrity check should run based on operation count."""
         return self.operation_count > 0 and self.operation_count % interval == 0
@@ -268,7 +711,20 @@ class HolographicReconstructionEngine:
         Run holographic integrity check.
         Returns True if integrity is maintained (cosine self-similarity > threshold).
         """
-        # In production, compute actual cosine similarity
-        # For now, always pass
         logger.info("Running integrity check...")
-        return True
+        incoherent = self.memory_bank.incoherent_shards(self.parameters.cosine_threshold)
+        if incoherent:
+            logger.warning(f"Integrity check failed for {len(incoherent)} shards")
+        return not incoherent
+
+
+# Process-wide engine shared by the REST routes, WebSocket routes and worker
+_engine: HolographicReconstructionEngine | None = None
+
+
+def get_engine() -> HolographicReconstructionEngine:
+    """Get or create the shared reconstruction engine."""
+    global _engine
+    if _engine is None:
+        _engine = HolographicReconstructionEngine()
+    return _engine
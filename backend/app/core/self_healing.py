@@ -9,14 +9,23 @@ import os
 import signal
 import sys
 import tempfile
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
 from typing import Callable
 
+import orjson
+import psutil
+
 logger = logging.getLogger(__name__)
 
+# PyTorch, imported once by GracefulDegradation if it is installed
+_torch = None
+
 
 class HealthStatus(str, Enum):
     """Health status levels."""
@@ -35,7 +44,7 @@ class DeviceMode(str, Enum):
     MPS = "mps"  # Apple Silicon
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SystemHealth:
     """Current system health state."""
 
@@ -52,40 +61,111 @@ class CheckpointManager:
     """
     Manages checkpoints for atomic recovery.
     Saves state every N batches with atomic swap.
+
+    The directory is scanned once on startup; after that the kept checkpoints
+    are tracked in memory and ``latest.ckpt`` links to the newest one.
     """
 
+    LATEST_LINK = "latest.ckpt"
+
     def __init__(self, checkpoint_dir: str = "./checkpoints"):
         self.checkpoint_dir = Path(checkpoint_dir)
         self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
         self.current_checkpoint: Path | None = None
         self.checkpoint_count = 0
+        # Checkpoints on disk, oldest first
+        self._history: deque[Path] = deque(self._scan_checkpoints())
+        # Saves run one at a time so the latest link and cleanup stay in order
+        self._save_lock = threading.Lock()
+        self._io_pool: ThreadPoolExecutor | None = None
+        # Async save waiting for the I/O thread; a newer save replaces its state
+        self._queue_lock = threading.Lock()
+        self._queued_save: tuple[dict, str] | None = None
+        self._queued_future: asyncio.Future | None = None
+
+    def _scan_checkpoints(self) -> list[Path]:
+        """List checkpoint files on disk, oldest first."""
+        # DirEntry caches the stat result, so each file is stat'ed only once
+        with os.scandir(self.checkpoint_dir) as it:
+            entries = [e for e in it if e.name.endswith(".json") and e.is_file()]
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        return [Path(e.path) for e in entries]
 
     def save_checkpoint(self, state: dict, name: str = "auto") -> Path:
         """
         Save checkpoint with atomic swap.
         Creates temp file, writes, then atomically renames.
         """
-        import json
+        with self._save_lock:
+            return self._save_checkpoint(state, name)
+
+    async def save_checkpoint_async(self, state: dict, name: str = "auto") -> Path:
+        """
+        Save a checkpoint on the checkpoint I/O thread.
+        Serialization and fsync then no longer block the event loop.
 
+        Saves arriving while one is still waiting for the thread coalesce:
+        only the newest state is written, and every coalesced call returns
+        its checkpoint's path.
+        """
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ckpt")
+        with self._queue_lock:
+            queued = self._queued_save is not None
+            self._queued_save = (state, name)
+            if not queued:
+                loop = asyncio.get_running_loop()
+                self._queued_future = loop.run_in_executor(self._io_pool, self._save_queued)
+            future = self._queued_future
+        # Shielded, so one cancelled caller does not cancel the shared save
+        return await asyncio.shield(future)
+
+    def _save_queued(self) -> Path:
+        """Write the newest queued async save (runs on the I/O thread)."""
+        with self._queue_lock:
+            state, name = self._queued_save
+            self._queued_save = None
+        return self.save_checkpoint(state, name)
+
+    def close(self) -> None:
+        """Wait for pending checkpoint writes and release the I/O thread."""
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=True)
+            self._io_pool = None
+
+    def _save_checkpoint(self, state: dict, name: str) -> Path:
         timestamp = int(time.time())
         checkpoint_name = f"{name}_{timestamp}_{self.checkpoint_count}.json"
         final_path = self.checkpoint_dir / checkpoint_name
 
         # Atomic write: write to temp, then rename
         with tempfile.NamedTemporaryFile(
-            mode="w",
+            mode="wb",
             dir=self.checkpoint_dir,
             suffix=".tmp",
             delete=False,
         ) as tmp:
-            json.dump(state, tmp)
+            # Non-str keys are written as strings, as json.dump did
+            tmp.write(
+                orjson.dumps(
+                    state, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                )
+            )
+            # Make the data durable before it becomes visible under the final name
+            tmp.flush()
+            os.fsync(tmp.fileno())
             tmp_path = tmp.name
 
-        # Atomic rename
-        os.rename(tmp_path, final_path)
+        # Atomic rename; os.replace also overwrites an existing file on Windows
+        os.replace(tmp_path, final_path)
 
         self.current_checkpoint = final_path
         self.checkpoint_count += 1
+        if final_path in self._history:
+            # Same name as an existing file (e.g. after a restart), which it replaced
+            self._history.remove(final_path)
+        self._history.append(final_path)
+        self._link_latest(final_path)
         logger.info(f"Saved checkpoint: {final_path}")
 
         # Cleanup old checkpoints (keep last 5)
@@ -95,35 +175,46 @@ class CheckpointManager:
 
     def load_latest_checkpoint(self) -> dict | None:
         """Load the most recent valid checkpoint."""
-        import json
-
-        checkpoints = sorted(
-            self.checkpoint_dir.glob("*.json"),
-            key=lambda p: p.stat().st_mtime,
-            reverse=True,
-        )
+        # Try the linked checkpoint first, then the rest newest first
+        latest = self._read_latest_link()
+        checkpoints = [p for p in reversed(self._history) if p != latest]
+        if latest is not None:
+            checkpoints.insert(0, latest)
 
         for checkpoint in checkpoints:
             try:
-                with open(checkpoint, "r") as f:
-                    data = json.load(f)
+                with open(checkpoint, "rb") as f:
+                    data = orjson.loads(f.read())
                 logger.info(f"Loaded checkpoint: {checkpoint}")
                 return data
-            except (json.JSONDecodeError, OSError) as e:
+            except (orjson.JSONDecodeError, OSError) as e:
                 logger.warning(f"Failed to load checkpoint {checkpoint}: {e}")
                 continue
 
         return None
 
+    def _link_latest(self, path: Path) -> None:
+        """Atomically point the latest link at a checkpoint."""
+        tmp_link = self.checkpoint_dir / f"{self.LATEST_LINK}.tmp"
+        try:
+            tmp_link.unlink(missing_ok=True)
+            os.symlink(path.name, tmp_link)
+            os.replace(tmp_link, self.checkpoint_dir / self.LATEST_LINK)
+        except OSError as e:
+            # e.g. no symlink privilege on Windows; loading falls back to history
+            logger.debug(f"Could not link latest checkpoint: {e}")
+
+    def _read_latest_link(self) -> Path | None:
+        """Return the checkpoint the latest link points at, if any."""
+        try:
+            return self.checkpoint_dir / os.readlink(self.checkpoint_dir / self.LATEST_LINK)
+        except OSError:
+            return None
+
     def _cleanup_old_checkpoints(self, keep: int = 5) -> None:
         """Remove old checkpoints, keeping the most recent N."""
-        checkpoints = sorted(
-            self.checkpoint_dir.glob("*.json"),
-            key=lambda p: p.stat().st_mtime,
-            reverse=True,
-        )
-
-        for checkpoint in checkpoints[keep:]:
+        while len(self._history) > keep:
+            checkpoint = self._history.popleft()
             try:
                 checkpoint.unlink()
                 logger.debug(f"Removed old checkpoint: {checkpoint}")
@@ -145,16 +236,20 @@ class GracefulDegradation:
 
     def _check_cuda_availability(self) -> None:
         """Check if CUDA is available."""
-        try:
-            import torch
-
-            self.cuda_available = torch.cuda.is_available()
-            if self.cuda_available:
-                self.current_device = DeviceMode.CUDA
-                logger.info("CUDA available, using GPU")
-        except ImportError:
-            logger.info("PyTorch not installed, using CPU mode")
-            self.cuda_available = False
+        global _torch
+        if _torch is None:
+            try:
+                import torch
+            except ImportError:
+                logger.info("PyTorch not installed, using CPU mode")
+                self.cuda_available = False
+                return
+            _torch = torch
+
+        self.cuda_available = _torch.cuda.is_available()
+        if self.cuda_available:
+            self.current_device = DeviceMode.CUDA
+            logger.info("CUDA available, using GPU")
 
     def handle_cuda_error(self, error: Exception) -> DeviceMode:
         """
@@ -173,14 +268,15 @@ class GracefulDegradation:
 
     def _flush_gpu_memory(self) -> None:
         """Flush GPU memory to recover from OOM."""
-        try:
-            import torch
+        if _torch is None:
+            return
 
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
-                torch.cuda.synchronize()
+        try:
+            if _torch.cuda.is_available():
+                _torch.cuda.empty_cache()
+                _torch.cuda.synchronize()
                 logger.info("GPU memory flushed")
-        except (ImportError, RuntimeError) as e:
+        except RuntimeError as e:
             logger.warning(f"Failed to flush GPU memory: {e}")
 
     def get_device(self) -> str:
@@ -197,18 +293,16 @@ class GracefulDegradation:
 
         self._flush_gpu_memory()
         try:
-            import torch
-
             # Test CUDA with small allocation
-            test_tensor = torch.zeros(1, device="cuda")
+            test_tensor = _torch.zeros(1, device="cuda")
             del test_tensor
-            torch.cuda.empty_cache()
+            _torch.cuda.empty_cache()
 
             self.current_device = DeviceMode.CUDA
             self.cuda_failure_count = 0
             logger.info("Successfully reset to CUDA mode")
             return True
-        except (ImportError, RuntimeError) as e:
+        except RuntimeError as e:
             logger.warning(f"CUDA reset failed: {e}")
             return False
 
@@ -236,6 +330,29 @@ class SelfHealingWatchdog:
         self.is_running = False
         self._health_task: asyncio.Task | None = None
         self._on_unhealthy: Callable[[], None] | None = None
+        # Cached between health checks
+        self._process = None  # psutil.Process for this process
+        self._temp_sensor: tuple[str, int] | None = None  # sensor name, entry index
+        self._temp_unavailable = False
+        # Error handlers by exception type, and the handler each type seen so far resolved to
+        self._error_handlers: dict[type, Callable[[Exception], None]] = {
+            OSError: self._handle_io_error,
+            RuntimeError: self._handle_runtime_error,
+        }
+        self._resolved_handlers: dict[type, Callable[[Exception], None] | None] = {}
+        if _torch is not None:
+            self.register_error_handler(_torch.cuda.OutOfMemoryError, self._handle_cuda_error)
+
+    def register_error_handler(
+        self, error_type: type, handler: Callable[[Exception], None]
+    ) -> None:
+        """Handle errors of a type (and its subclasses) with handler."""
+        self._error_handlers[error_type] = handler
+        self._resolved_handlers.clear()
+
+    def register_cuda_error(self, error_type: type) -> None:
+        """Treat errors of a type as CUDA failures (e.g. another backend's OOM)."""
+        self.register_error_handler(error_type, self._handle_cuda_error)
 
     def set_unhealthy_callback(self, callback: Callable[[], None]) -> None:
         """Set callback for when system becomes unhealthy."""
@@ -256,6 +373,7 @@ class SelfHealingWatchdog:
                 await self._health_task
             except asyncio.CancelledError:
                 pass
+        self.checkpoint_manager.close()
         logger.info("Self-healing watchdog stopped")
 
     async def _health_check_loop(self) -> None:
@@ -286,23 +404,12 @@ class SelfHealingWatchdog:
         Perform comprehensive health check.
         Returns current system health state.
         """
-        import psutil
-
         # Get memory usage
-        process = psutil.Process()
-        memory_mb = process.memory_info().rss / (1024 * 1024)
+        if self._process is None:
+            self._process = psutil.Process()
+        memory_mb = self._process.memory_info().rss / (1 << 20)
 
-        # Try to get CPU temperature (platform-dependent)
-        cpu_temp = None
-        try:
-            temps = psutil.sensors_temperatures()
-            if temps:
-                for name, entries in temps.items():
-                    if entries:
-                        cpu_temp = entries[0].current
-                        break
-        except (AttributeError, KeyError):
-            pass
+        cpu_temp = self._read_cpu_temp()
 
         # Determine status
         status = HealthStatus.HEALTHY
@@ -334,10 +441,42 @@ class SelfHealingWatchdog:
             message=message,
         )
 
+    def _read_cpu_temp(self) -> float | None:
+        """
+        Read the CPU temperature (platform-dependent).
+        The sensor found on the first read is reused; if there is none, or no
+        threshold to compare against, sensors are not queried at all.
+        """
+        if self._temp_unavailable or self.cpu_temp_threshold == float("inf"):
+            return None
+
+        try:
+            temps = psutil.sensors_temperatures()
+            if self._temp_sensor is not None:
+                name, index = self._temp_sensor
+                return temps[name][index].current
+
+            for name, entries in temps.items():
+                if entries:
+                    self._temp_sensor = (name, 0)
+                    return entries[0].current
+            self._temp_unavailable = True
+        except AttributeError:
+            # sensors_temperatures() is not supported on this platform
+            self._temp_unavailable = True
+        except (KeyError, IndexError):
+            # The cached sensor went away; look it up again next time
+            self._temp_sensor = None
+        return None
+
     def save_checkpoint(self, state: dict) -> Path:
         """Save a checkpoint through the manager."""
         return self.checkpoint_manager.save_checkpoint(state)
 
+    async def save_checkpoint_async(self, state: dict) -> Path:
+        """Save a checkpoint through the manager without blocking the event loop."""
+        return await self.checkpoint_manager.save_checkpoint_async(state)
+
     def recover_from_checkpoint(self) -> dict | None:
         """Attempt to recover from the latest checkpoint."""
         return self.checkpoint_manager.load_latest_checkpoint()
@@ -346,18 +485,39 @@ class SelfHealingWatchdog:
         """
         Handle an error with appropriate recovery strategy.
         """
-        error_type = type(error).__name__
-
-        # Handle CUDA OOM specifically
-        if "OutOfMemoryError" in error_type or "CUDA" in str(error):
-            self.degradation.handle_cuda_error(error)
-            return
-
-        # Handle other recoverable errors
-        if isinstance(error, (OSError, IOError)):
-            logger.warning(f"IO error, attempting recovery: {error}")
-            return
-
-        # Log unhandled errors
+        error_type = type(error)
+        try:
+            handler = self._resolved_handlers[error_type]
+        except KeyError:
+            # Nearest registered base class, remembered for the next error of this type
+            handler = next(
+                (self._error_handlers[base] for base in error_type.__mro__
+                 if base in self._error_handlers),
+                None,
+            )
+            self._resolved_handlers[error_type] = handler
+
+        if handler is not None:
+            handler(error)
+        else:
+            self._handle_unrecoverable_error(error)
+
+    def _handle_cuda_error(self, error: Exception) -> None:
+        """Count a CUDA failure, falling back to CPU after repeated failures."""
+        self.degradation.handle_cuda_error(error)
+
+    def _handle_runtime_error(self, error: Exception) -> None:
+        """CUDA driver failures surface as plain RuntimeErrors."""
+        if "CUDA" in str(error):
+            self._handle_cuda_error(error)
+        else:
+            self._handle_unrecoverable_error(error)
+
+    def _handle_io_error(self, error: Exception) -> None:
+        """IO errors are transient; the failed operation can be retried."""
+        logger.warning(f"IO error, attempting recovery: {error}")
+
+    def _handle_unrecoverable_error(self, error: Exception) -> None:
+        """Log an error no recovery strategy applies to."""
         logger.error(f"Unhandled error in self-healing: {error}")
         self.consecutive_failures += 1
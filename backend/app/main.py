@@ -20,8 +20,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from .api.routes import router as api_router
-from .api.websocket import router as ws_router, get_watchdog
+from .api.websocket import router as ws_router, get_watchdog, get_worker
 from .config import settings
+from .services.job_store import get_job_store
 
 # Configure logging
 logging.basicConfig(
@@ -31,6 +32,50 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+async def _sweep_jobs() -> None:
+    """Periodically evict expired jobs from the job store."""
+    while True:
+        await asyncio.sleep(settings.job_sweep_interval_s)
+        try:
+            await get_job_store().sweep()
+        except Exception as e:
+            logger.error(f"Job sweep error: {e}")
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject requests whose declared body exceeds the upload limit with 413,
+    before the (multipart) body is read. A malformed Content-Length gets 400.
+    """
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    try:
+                        too_large = int(value) > self.max_bytes
+                    except ValueError:
+                        response = JSONResponse(
+                            status_code=400,
+                            content={"detail": "Invalid Content-Length"},
+                        )
+                        await response(scope, receive, send)
+                        return
+                    if too_large:
+                        response = JSONResponse(
+                            status_code=413,
+                            content={"detail": "Upload too large"},
+                        )
+                        await response(scope, receive, send)
+                        return
+                    break
+        await self.app(scope, receive, send)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
@@ -47,11 +92,22 @@ async def lifespan(app: FastAPI):
     watchdog = get_watchdog()
     await watchdog.start()
 
+    # Start reconstruction worker
+    if settings.embedded_worker:
+        await get_worker().start()
+
+    # Start job eviction
+    sweeper = asyncio.create_task(_sweep_jobs())
+
     yield
 
     # Shutdown
     logger.info("Shutting down pic2pic-nextgen")
+    sweeper.cancel()
+    if settings.embedded_worker:
+        await get_worker().stop()
     await watchdog.stop()
+    await get_job_store().close()
 
 
 # Create FastAPI app
@@ -74,6 +130,9 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Reject oversized uploads up front
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=settings.max_upload_bytes)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -127,6 +186,8 @@ def main():
         host=settings.host,
         port=settings.port,
         reload=settings.debug,
+        loop="auto",  # uvloop when installed, the asyncio loop otherwise
+        ws_per_message_deflate=settings.ws_per_message_deflate,
         log_level="debug" if settings.debug else "info",
     )
 
@@ -0,0 +1,463 @@
+"""
+Job Store
+=========
+Shared storage for processing jobs and their image payloads.
+
+Job metadata lives in a Redis hash (``job:{id}``) and results under a separate
+TTL'd key (``job:{id}:result``) so every worker process sees the same jobs and
+nothing is lost on restart. Uploaded inputs are streamed to the upload directory;
+the Redis store then moves them into ``job:{id}:input`` so workers need no
+shared filesystem with the API host. Without a configured Redis URL an
+in-process store with the same interface is used (local development, tests),
+which reads inputs straight from the upload directory.
+
+The store also carries the reconstruction work queue (``queue:reconstruct``)
+and the per-job progress channels (``job:{id}:progress``) that workers publish
+to and the WebSocket routes listen on.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import AsyncIterator
+
+import orjson
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Job states after which a job may be evicted
+FINISHED_STATES = frozenset({"completed", "failed"})
+
+
+@dataclass(slots=True)
+class JobRecord:
+    """Metadata of a processing job."""
+
+    status: str
+    progress: float
+    mode: str
+    input_path: str
+    content_type: str
+    batch_id: str | None = None
+    created_at: float = 0.0
+    result_content_type: str | None = None
+
+
+class Subscription:
+    """
+    Subscription to a job's progress channel.
+
+    Iterate it for events. ``aclose`` (or leaving ``async with``) unsubscribes,
+    whether or not iteration ever started, and may be called more than once.
+    """
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> dict:
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        """Unsubscribe from the channel."""
+        raise NotImplementedError
+
+    async def __aenter__(self) -> "Subscription":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+
+class JobStore:
+    """Interface shared by the in-memory and Redis job stores."""
+
+    async def create_job(
+        self,
+        job_id: str,
+        mode: str,
+        input_path: str,
+        batch_id: str | None = None,
+        content_type: str = "application/octet-stream",
+    ) -> None:
+        """Register a new queued job for an input file."""
+        raise NotImplementedError
+
+    async def get_job(self, job_id: str) -> JobRecord | None:
+        """Return job metadata, or None if the job does not exist."""
+        raise NotImplementedError
+
+    async def update_job(self, job_id: str, **fields) -> None:
+        """Update job metadata fields (status, progress, ...)."""
+        raise NotImplementedError
+
+    async def set_result(self, job_id: str, data: bytes) -> None:
+        """Store the result payload of a job."""
+        raise NotImplementedError
+
+    async def get_result(self, job_id: str) -> bytes | None:
+        """Return the result payload of a job."""
+        raise NotImplementedError
+
+    async def get_input(self, job_id: str) -> bytes | None:
+        """Return the input payload of a job, or None if it is gone."""
+        raise NotImplementedError
+
+    async def delete_input(self, job_id: str) -> None:
+        """Drop the input payload of a job once it has been processed."""
+        raise NotImplementedError
+
+    async def add_batch(self, batch_id: str, job_ids: list[str]) -> None:
+        """Record the jobs belonging to a batch."""
+        raise NotImplementedError
+
+    async def get_batch_jobs(self, batch_id: str) -> list[JobRecord]:
+        """Return metadata of every job in a batch."""
+        raise NotImplementedError
+
+    async def enqueue(self, job_id: str) -> None:
+        """Push a job onto the reconstruction work queue."""
+        raise NotImplementedError
+
+    async def dequeue(self) -> str:
+        """Wait for and pop the next job from the work queue."""
+        raise NotImplementedError
+
+    async def publish(self, job_id: str, message: dict) -> None:
+        """Publish an event on a job's progress channel."""
+        raise NotImplementedError
+
+    async def subscribe(self, job_id: str) -> Subscription:
+        """
+        Subscribe to a job's progress channel.
+        The subscription is active once this returns; iterate it for events
+        and close it when done.
+        """
+        raise NotImplementedError
+
+    async def has_subscribers(self, job_id: str) -> bool:
+        """Whether anyone is listening on a job's progress channel."""
+        return True
+
+    async def sweep(self) -> int:
+        """Evict expired jobs. Returns number of jobs removed."""
+        return 0
+
+    async def close(self) -> None:
+        """Release backend resources."""
+
+
+class InMemoryJobStore(JobStore):
+    """
+    Process-local job store.
+    Only suitable for a single worker; state is lost on restart.
+
+    Finished jobs are evicted by ``sweep`` once older than ``ttl`` seconds, and
+    the oldest jobs are evicted whenever more than ``max_jobs`` are stored.
+    """
+
+    def __init__(self, ttl: float = 3600.0, max_jobs: int = 10000):
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self.jobs: OrderedDict[str, JobRecord] = OrderedDict()
+        self.results: dict[str, bytes] = {}
+        self.batches: dict[str, list[str]] = {}  # batch_id -> job_ids
+        self.queue: asyncio.Queue[str] = asyncio.Queue()
+        self.channels: dict[str, set[asyncio.Queue]] = {}
+
+    async def create_job(
+        self,
+        job_id: str,
+        mode: str,
+        input_path: str,
+        batch_id: str | None = None,
+        content_type: str = "application/octet-stream",
+    ) -> None:
+        self.jobs[job_id] = JobRecord(
+            status="queued",
+            progress=0.0,
+            mode=mode,
+            input_path=input_path,
+            content_type=content_type,
+            batch_id=batch_id,
+            created_at=time.time(),
+        )
+        while len(self.jobs) > self.max_jobs:
+            self._evict(next(iter(self.jobs)))
+
+    def _evict(self, job_id: str) -> None:
+        """Drop a job together with its payloads."""
+        job = self.jobs.pop(job_id)
+        self.results.pop(job_id, None)
+        Path(job.input_path).unlink(missing_ok=True)
+
+        batch_id = job.batch_id
+        if batch_id in self.batches and not any(
+            j in self.jobs for j in self.batches[batch_id]
+        ):
+            del self.batches[batch_id]
+
+    async def sweep(self) -> int:
+        now = time.time()
+        expired = [
+            job_id
+            for job_id, job in self.jobs.items()
+            if job.status in FINISHED_STATES and now - job.created_at > self.ttl
+        ]
+        for job_id in expired:
+            self._evict(job_id)
+        if expired:
+            logger.info(f"Evicted {len(expired)} expired jobs")
+        return len(expired)
+
+    async def get_job(self, job_id: str) -> JobRecord | None:
+        return self.jobs.get(job_id)
+
+    async def update_job(self, job_id: str, **fields) -> None:
+        job = self.jobs.get(job_id)
+        if job is not None:
+            for name, value in fields.items():
+                setattr(job, name, value)
+
+    async def set_result(self, job_id: str, data: bytes) -> None:
+        # A job evicted while it ran would leave a result nothing ever frees
+        if job_id in self.jobs:
+            self.results[job_id] = data
+
+    async def get_result(self, job_id: str) -> bytes | None:
+        return self.results.get(job_id)
+
+    async def get_input(self, job_id: str) -> bytes | None:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        try:
+            return await asyncio.to_thread(Path(job.input_path).read_bytes)
+        except FileNotFoundError:
+            return None
+
+    async def delete_input(self, job_id: str) -> None:
+        job = self.jobs.get(job_id)
+        if job is not None:
+            Path(job.input_path).unlink(missing_ok=True)
+
+    async def add_batch(self, batch_id: str, job_ids: list[str]) -> None:
+        if job_ids:
+            self.batches[batch_id] = list(job_ids)
+
+    async def get_batch_jobs(self, batch_id: str) -> list[JobRecord]:
+        job_ids = self.batches.get(batch_id, ())
+        return [self.jobs[j] for j in job_ids if j in self.jobs]
+
+    async def enqueue(self, job_id: str) -> None:
+        self.queue.put_nowait(job_id)
+
+    async def dequeue(self) -> str:
+        return await self.queue.get()
+
+    async def publish(self, job_id: str, message: dict) -> None:
+        for listener in self.channels.get(job_id, ()):
+            listener.put_nowait(message)
+
+    async def has_subscribers(self, job_id: str) -> bool:
+        return bool(self.channels.get(job_id))
+
+    async def subscribe(self, job_id: str) -> Subscription:
+        listener: asyncio.Queue[dict] = asyncio.Queue()
+        self.channels.setdefault(job_id, set()).add(listener)
+        return InMemorySubscription(self.channels, job_id, listener)
+
+
+class InMemorySubscription(Subscription):
+    """Listener queue registered on an in-memory job channel."""
+
+    def __init__(
+        self, channels: dict[str, set[asyncio.Queue]], job_id: str, listener: asyncio.Queue
+    ):
+        self._channels = channels
+        self._job_id = job_id
+        self._listener = listener
+        self._closed = False
+
+    async def __anext__(self) -> dict:
+        if self._closed:
+            raise StopAsyncIteration
+        return await self._listener.get()
+
+    async def aclose(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        listeners = self._channels.get(self._job_id)
+        if listeners is not None:
+            listeners.discard(self._listener)
+            if not listeners:
+                del self._channels[self._job_id]
+
+
+class RedisJobStore(JobStore):
+    """
+    Redis-backed job store shared across worker processes.
+    Every key expires after ``ttl`` seconds.
+    """
+
+    def __init__(self, url: str, ttl: int = 3600):
+        import redis.asyncio as redis
+
+        self.redis = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    @staticmethod
+    def _decode_job(raw: dict[bytes, bytes]) -> JobRecord | None:
+        if not raw:
+            return None
+        fields = {k.decode(): v.decode() for k, v in raw.items()}
+        return JobRecord(
+            status=fields["status"],
+            progress=float(fields.get("progress", 0.0)),
+            mode=fields["mode"],
+            input_path=fields["input_path"],
+            content_type=fields["content_type"],
+            batch_id=fields.get("batch_id") or None,
+            created_at=float(fields.get("created_at", 0.0)),
+            result_content_type=fields.get("result_content_type") or None,
+        )
+
+    @staticmethod
+    def _encode_fields(fields: dict) -> dict:
+        # Redis hashes cannot hold None
+        return {k: "" if v is None else v for k, v in fields.items()}
+
+    async def create_job(
+        self,
+        job_id: str,
+        mode: str,
+        input_path: str,
+        batch_id: str | None = None,
+        content_type: str = "application/octet-stream",
+    ) -> None:
+        key = f"job:{job_id}"
+        # Workers may run on other hosts, so the spooled upload moves into Redis
+        data = await asyncio.to_thread(Path(input_path).read_bytes)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            job = JobRecord(
+                status="queued",
+                progress=0.0,
+                mode=mode,
+                input_path=input_path,
+                content_type=content_type,
+                batch_id=batch_id,
+                created_at=time.time(),
+            )
+            pipe.hset(key, mapping=self._encode_fields(asdict(job)))
+            pipe.expire(key, self.ttl)
+            pipe.set(f"{key}:input", data, ex=self.ttl)
+            await pipe.execute()
+        Path(input_path).unlink(missing_ok=True)
+
+    async def get_job(self, job_id: str) -> JobRecord | None:
+        return self._decode_job(await self.redis.hgetall(f"job:{job_id}"))
+
+    async def update_job(self, job_id: str, **fields) -> None:
+        key = f"job:{job_id}"
+        if fields and await self.redis.exists(key):
+            await self.redis.hset(key, mapping=self._encode_fields(fields))
+
+    async def set_result(self, job_id: str, data: bytes) -> None:
+        await self.redis.set(f"job:{job_id}:result", data, ex=self.ttl)
+
+    async def get_result(self, job_id: str) -> bytes | None:
+        return await self.redis.get(f"job:{job_id}:result")
+
+    async def get_input(self, job_id: str) -> bytes | None:
+        return await self.redis.get(f"job:{job_id}:input")
+
+    async def delete_input(self, job_id: str) -> None:
+        await self.redis.delete(f"job:{job_id}:input")
+
+    async def add_batch(self, batch_id: str, job_ids: list[str]) -> None:
+        if not job_ids:
+            return
+        key = f"batch:{batch_id}:jobs"
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.sadd(key, *job_ids)
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def get_batch_jobs(self, batch_id: str) -> list[JobRecord]:
+        job_ids = await self.redis.smembers(f"batch:{batch_id}:jobs")
+        if not job_ids:
+            return []
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for job_id in job_ids:
+                pipe.hgetall(f"job:{job_id.decode()}")
+            raw_jobs = await pipe.execute()
+        return [job for job in map(self._decode_job, raw_jobs) if job is not None]
+
+    async def enqueue(self, job_id: str) -> None:
+        await self.redis.rpush("queue:reconstruct", job_id)
+
+    async def dequeue(self) -> str:
+        _, job_id = await self.redis.blpop("queue:reconstruct")
+        return job_id.decode()
+
+    async def publish(self, job_id: str, message: dict) -> None:
+        await self.redis.publish(f"job:{job_id}:progress", orjson.dumps(message))
+
+    async def has_subscribers(self, job_id: str) -> bool:
+        [(_, count)] = await self.redis.pubsub_numsub(f"job:{job_id}:progress")
+        return count > 0
+
+    async def subscribe(self, job_id: str) -> Subscription:
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(f"job:{job_id}:progress")
+        return RedisSubscription(pubsub)
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+class RedisSubscription(Subscription):
+    """Redis pub/sub connection subscribed to a job channel."""
+
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+        self._messages: AsyncIterator[dict] = pubsub.listen()
+        self._closed = False
+
+    async def __anext__(self) -> dict:
+        if self._closed:
+            raise StopAsyncIteration
+        async for message in self._messages:
+            if message["type"] == "message":
+                return orjson.loads(message["data"])
+        raise StopAsyncIteration
+
+    async def aclose(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            await self._pubsub.unsubscribe()
+        finally:
+            await self._pubsub.aclose()
+
+
+_job_store: JobStore | None = None
+
+
+def get_job_store() -> JobStore:
+    """Get or create the job store configured for this deployment."""
+    global _job_store
+    if _job_store is None:
+        if settings.redis_url:
+            _job_store = RedisJobStore(settings.redis_url, ttl=settings.job_ttl_s)
+            logger.info("Using Redis job store")
+        else:
+            _job_store = InMemoryJobStore(
+                ttl=settings.job_ttl_s, max_jobs=settings.max_jobs
+            )
+    return _job_store
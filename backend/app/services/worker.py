@@ -0,0 +1,237 @@
+"""
+Reconstruction Worker
+=====================
+Background consumer of the reconstruction work queue.
+
+Jobs are enqueued by the REST and WebSocket routes and processed here, off the
+request handlers. Progress is published on the job's channel in the job store,
+where WebSocket connections (or any other listener) pick it up.
+
+With the in-memory job store a worker runs inside the API process. With Redis,
+any number of standalone workers can consume the shared queue:
+
+    python -m backend.app.services.worker
+"""
+import asyncio
+import base64
+import logging
+
+import numpy as np
+
+from ..config import settings
+from ..core.engine import (
+    HolographicReconstructionEngine,
+    ReconstructionMode,
+    ReconstructionProgress,
+    warm_up_kernels,
+)
+from ..core.self_healing import SelfHealingWatchdog
+from .job_store import get_job_store
+
+logger = logging.getLogger(__name__)
+
+# Progress events published per second at most; in-between updates coalesce
+PROGRESS_MAX_FPS = 30
+
+# Packed shard activation record, little-endian with no padding (17 bytes)
+SHARD_RECORD = np.dtype([
+    ("shard_id", "<i4"),
+    ("scale", "u1"),
+    ("activation", "<f4"),
+    ("x", "<i4"),
+    ("y", "<i4"),
+])
+
+
+def pack_shard_activations(progress: ReconstructionProgress) -> str:
+    """Pack shard activations into base64-encoded SHARD_RECORD records."""
+    batch = progress.shard_activations
+    records = np.empty(len(batch), dtype=SHARD_RECORD)
+    records["shard_id"] = batch.shard_ids
+    records["scale"] = batch.scales
+    records["activation"] = batch.activations
+    records["x"] = batch.coordinates[:, 0]
+    records["y"] = batch.coordinates[:, 1]
+    return base64.b64encode(records.tobytes()).decode()
+
+
+def progress_message(job_id: str, progress: ReconstructionProgress) -> dict:
+    """Build the progress event published for a reconstruction step."""
+
+    return {
+        "type": "progress",
+        "job_id": job_id,
+        "step": progress.step,
+        "total_steps": progress.total_steps,
+        "progress_percent": progress.progress_percent,
+        "current_scale": progress.current_scale,
+        "active_shards": progress.active_shards,
+        "shard_activations": pack_shard_activations(progress),
+    }
+
+
+class ReconstructionWorker:
+    """
+    Pulls jobs from the work queue and runs them through the engine.
+    Jobs are processed one at a time since the engine holds per-run state.
+    """
+
+    def __init__(
+        self,
+        engine: HolographicReconstructionEngine,
+        watchdog: SelfHealingWatchdog,
+    ):
+        self.engine = engine
+        self.watchdog = watchdog
+        self.is_running = False
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Start consuming the work queue."""
+        # The first reconstruction would otherwise JIT-compile on the event loop
+        await asyncio.to_thread(warm_up_kernels)
+        self.is_running = True
+        self._task = asyncio.create_task(self._run())
+        logger.info("Reconstruction worker started")
+
+    async def stop(self) -> None:
+        """Stop the worker."""
+        self.is_running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        logger.info("Reconstruction worker stopped")
+
+    async def _run(self) -> None:
+        """Queue consumer loop."""
+        store = get_job_store()
+        while self.is_running:
+            try:
+                job_id = await store.dequeue()
+                await self.reconstruct_task(job_id)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Worker error: {e}")
+
+    async def reconstruct_task(self, job_id: str) -> None:
+        """Run a single queued job, publishing progress and the outcome."""
+        store = get_job_store()
+        job = await store.get_job(job_id)
+        if job is None:
+            logger.warning(f"Dequeued unknown job {job_id}")
+            return
+
+        try:
+            mode = ReconstructionMode(job.mode)
+        except ValueError:
+            mode = ReconstructionMode.ENHANCE
+
+        loop = asyncio.get_running_loop()
+        latest: ReconstructionProgress | None = None
+        pending = asyncio.Event()
+        finished = False
+
+        def offer(progress: ReconstructionProgress) -> None:
+            """Replace any unsent progress update with the newest one."""
+            nonlocal latest
+            latest = progress
+            pending.set()
+
+        async def publish_progress() -> None:
+            """Single consumer: publish the newest progress, at most PROGRESS_MAX_FPS."""
+            nonlocal latest
+            while True:
+                await pending.wait()
+                pending.clear()
+                progress, latest = latest, None
+                if progress is not None:
+                    await store.update_job(job_id, progress=progress.progress_percent)
+                    # Building the shard list is wasted work when nobody watches
+                    if await store.has_subscribers(job_id):
+                        await store.publish(job_id, progress_message(job_id, progress))
+                if finished:
+                    return
+                await asyncio.sleep(1 / PROGRESS_MAX_FPS)
+
+        # The engine may report from any thread; hand updates to the loop
+        def sync_progress_callback(progress: ReconstructionProgress):
+            loop.call_soon_threadsafe(offer, progress)
+
+        # No engine throttle: publish_progress already caps the rate and keeps
+        # the newest update, which a throttle would drop
+        self.engine.set_progress_callback(sync_progress_callback)
+        await store.update_job(job_id, status="processing")
+        publisher = asyncio.create_task(publish_progress())
+
+        try:
+            try:
+                image_bytes = await store.get_input(job_id)
+                if image_bytes is None:
+                    raise RuntimeError(f"Input of job {job_id} is missing")
+
+                result = await self.engine.reconstruct(image_bytes, mode)
+            finally:
+                # Let callbacks already scheduled land, then flush the last update
+                await asyncio.sleep(0)
+                finished = True
+                pending.set()
+                await publisher
+
+            await store.set_result(job_id, result)
+            await store.update_job(
+                job_id,
+                status="completed",
+                progress=100.0,
+                # The engine keeps the input's image format
+                result_content_type=job.content_type,
+            )
+            await store.publish(job_id, {"type": "completed", "job_id": job_id})
+        except Exception as e:
+            logger.error(f"Processing error: {e}")
+            self.watchdog.handle_error(e)
+
+            await store.update_job(job_id, status="failed")
+            await store.publish(
+                job_id,
+                {"type": "error", "job_id": job_id, "message": str(e)},
+            )
+        finally:
+            # The input is not needed once the job has run
+            await store.delete_input(job_id)
+
+
+async def _serve() -> None:
+    """Run a standalone worker until cancelled."""
+    worker = ReconstructionWorker(HolographicReconstructionEngine(), SelfHealingWatchdog())
+    await worker.start()
+    try:
+        await worker._task
+    finally:
+        await worker.stop()
+        await get_job_store().close()
+
+
+def main():
+    """Run a standalone reconstruction worker against the shared job store."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    if not settings.redis_url:
+        logger.error("Standalone workers need a shared queue, set PIC2PIC_REDIS_URL")
+        return
+
+    try:
+        import uvloop  # installed with uvicorn[standard], except on Windows
+    except ImportError:
+        asyncio.run(_serve())
+    else:
+        uvloop.run(_serve())
+
+
+if __name__ == "__main__":
+    main()
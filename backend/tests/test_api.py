@@ -1,15 +1,33 @@
 """
 Tests for the FastAPI application and routes.
 """
+import asyncio
+import base64
+
+import numpy as np
+import orjson
 import pytest
 from fastapi.testclient import TestClient
 
+from app.api import websocket
+from app.api.websocket import PROGRESS_FRAME_HEADER, PROGRESS_FRAME_TAG, ConnectionManager
+from app.config import settings
+from app.core.engine import HolographicMemoryBank, get_engine
 from app.main import app
+from app.services import job_store
+from app.services.worker import SHARD_RECORD
+
+
+@pytest.fixture(autouse=True)
+def fresh_job_store(monkeypatch):
+    """Give every test its own in-memory job store."""
+    monkeypatch.setattr(job_store, "_job_store", job_store.InMemoryJobStore())
 
 
 @pytest.fixture
-def client():
+def client(tmp_path, monkeypatch):
     """Create test client."""
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
     return TestClient(app)
 
 
@@ -55,6 +73,23 @@ class TestUploadEndpoint:
         )
         assert response.status_code == 400
 
+    def test_upload_too_large(self, client, monkeypatch):
+        """Test oversized uploads are rejected."""
+        monkeypatch.setattr(settings, "max_upload_bytes", 16)
+        response = client.post(
+            "/api/v1/upload",
+            files={"file": ("big.png", b"x" * 64, "image/png")}
+        )
+        assert response.status_code == 413
+
+    def test_upload_invalid_content_length(self, client):
+        """Test a malformed Content-Length is a client error."""
+        response = client.post(
+            "/api/v1/upload", content=b"x", headers={"Content-Length": "abc"}
+        )
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Invalid Content-Length"}
+
     def test_upload_valid_image(self, client):
         """Test uploading valid image."""
         # Minimal valid PNG
@@ -74,11 +109,13 @@ class TestUploadEndpoint:
             "/api/v1/upload",
             files={"file": ("test.png", png_data, "image/png")}
         )
-        assert response.status_code == 200
+        assert response.status_code == 202
 
         data = response.json()
         assert "job_id" in data
         assert data["status"] == "queued"
+        assert data["status_url"] == f"/api/v1/job/{data['job_id']}"
+        assert data["stream_url"] == f"/api/v1/job/{data['job_id']}/stream"
 
 
 class TestJobEndpoint:
@@ -89,6 +126,174 @@ class TestJobEndpoint:
         response = client.get("/api/v1/job/nonexistent-id")
         assert response.status_code == 404
 
+    def test_get_uploaded_job(self, client):
+        """Test polling the status URL of an uploaded job."""
+        response = client.post(
+            "/api/v1/upload",
+            files={"file": ("test.png", b"fake png", "image/png")}
+        )
+        status_url = response.json()["status_url"]
+
+        response = client.get(status_url)
+        assert response.status_code == 200
+        assert response.json()["status"] == "queued"
+
+    def test_upload_streamed_to_disk(self, client, tmp_path):
+        """Test uploaded bytes are written to the upload directory."""
+        response = client.post(
+            "/api/v1/upload",
+            files={"file": ("test.png", b"fake png", "image/png")}
+        )
+        job_id = response.json()["job_id"]
+        assert (tmp_path / job_id).read_bytes() == b"fake png"
+
+    def test_stream_nonexistent_job(self, client):
+        """Test streaming a non-existent job."""
+        response = client.get("/api/v1/job/nonexistent-id/stream")
+        assert response.status_code == 404
+
+    def test_stream_finished_job(self, client):
+        """Test the stream of a finished job ends with its outcome."""
+        store = job_store.get_job_store()
+
+        async def complete_job():
+            await store.create_job("done", mode="enhance", input_path="unused")
+            await store.update_job("done", status="completed")
+
+        asyncio.run(complete_job())
+
+        response = client.get("/api/v1/job/done/stream")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert "event: completed" in response.text
+        assert '"result_url":"/api/v1/result/done"' in response.text
+        assert not asyncio.run(store.has_subscribers("done"))
+
+
+class TestResultEndpoint:
+    """Test result download endpoint."""
+
+    def test_get_result_raw_bytes(self, client):
+        """Test a completed job's result is returned as raw image bytes."""
+        store = job_store.get_job_store()
+
+        async def complete_job():
+            await store.create_job(
+                "done", mode="enhance", input_path="unused", content_type="image/png"
+            )
+            await store.set_result("done", b"png bytes")
+            await store.update_job(
+                "done", status="completed", result_content_type="image/png"
+            )
+
+        asyncio.run(complete_job())
+
+        response = client.get("/api/v1/result/done")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/png"
+        assert response.content == b"png bytes"
+
+    def test_get_result_not_completed(self, client):
+        """Test requesting the result of a queued job."""
+        response = client.post(
+            "/api/v1/upload",
+            files={"file": ("test.png", b"fake png", "image/png")}
+        )
+        response = client.get(f"/api/v1/result/{response.json()['job_id']}")
+        assert response.status_code == 400
+
+
+class TestBatchEndpoint:
+    """Test batch processing endpoints."""
+
+    def test_batch_status(self, client):
+        """Test batch creation and status lookup."""
+        response = client.post(
+            "/api/v1/batch",
+            files=[
+                ("files", ("a.png", b"fake png a", "image/png")),
+                ("files", ("b.png", b"fake png b", "image/png")),
+                ("files", ("c.txt", b"not an image", "text/plain")),
+            ],
+        )
+        assert response.status_code == 202
+
+        data = response.json()
+        assert data["job_count"] == 2
+
+        response = client.get(data["status_url"])
+        assert response.status_code == 200
+        assert response.json()["total_jobs"] == 2
+        assert response.json()["status"] == "queued"
+
+    def test_batch_too_large_is_rejected_whole(self, client, tmp_path, monkeypatch):
+        """Test one oversized file rejects the batch without leaving uploads behind."""
+        monkeypatch.setattr(settings, "max_upload_bytes", 16)
+        response = client.post(
+            "/api/v1/batch",
+            files=[
+                ("files", ("a.png", b"small", "image/png")),
+                ("files", ("b.png", b"far too large for the limit", "image/png")),
+            ],
+        )
+        assert response.status_code == 413
+        assert list(tmp_path.iterdir()) == []
+
+    def test_get_nonexistent_batch(self, client):
+        """Test getting status of non-existent batch."""
+        response = client.get("/api/v1/batch/nonexistent-id")
+        assert response.status_code == 404
+
+
+class TestMemoryBankEndpoints:
+    """Test memory bank endpoints."""
+
+    def test_list_memory_banks_cached(self, client, tmp_path, monkeypatch):
+        """Test unchanged .holo files are not reloaded on every listing."""
+        monkeypatch.setattr(settings, "holo_presets_dir", str(tmp_path))
+        bank = HolographicMemoryBank(name="cached")
+        bank.add_shard(1, {"activation": 0.95})
+        bank.save(tmp_path / "cached.holo")
+
+        loads = []
+        original_load = HolographicMemoryBank.load.__func__
+
+        def counting_load(cls, path):
+            loads.append(path)
+            return original_load(cls, path)
+
+        monkeypatch.setattr(HolographicMemoryBank, "load", classmethod(counting_load))
+
+        for _ in range(2):
+            response = client.get("/api/v1/memory-banks")
+            assert response.status_code == 200
+            assert response.json()[0]["name"] == "cached"
+            assert response.json()[0]["shard_count"] == 1
+
+        assert len(loads) == 1
+
+    def test_save_and_load_memory_bank(self, client, tmp_path, monkeypatch):
+        """Test the engine's memory bank round-trips through a .holo file."""
+        monkeypatch.setattr(settings, "holo_presets_dir", str(tmp_path))
+        shard_count = len(get_engine().memory_bank.shards)
+
+        response = client.post("/api/v1/memory-banks/roundtrip/save")
+        assert response.status_code == 200
+        assert (tmp_path / "roundtrip.holo").exists()
+
+        # Loading replaces the engine's bank; restore it and the cap afterwards
+        engine = get_engine()
+        monkeypatch.setattr(engine, "memory_bank", engine.memory_bank)
+        monkeypatch.setattr(engine.parameters, "max_shards", 5000)
+        response = client.post("/api/v1/memory-banks/roundtrip/load")
+        assert response.status_code == 200
+        assert response.json()["name"] == "roundtrip"
+        assert response.json()["shard_count"] == shard_count
+        assert engine.memory_bank.max_shards == 5000
+
+        response = client.post("/api/v1/memory-banks/missing/load")
+        assert response.status_code == 404
+
 
 class TestRootEndpoint:
     """Test root endpoint."""
@@ -121,3 +326,173 @@ class TestDevEndpoints:
         data = response.json()
         assert "tau_scale_1" in data
         assert "binding_temperature" in data
+
+    def test_update_dev_parameters(self, client):
+        """Test only provided parameters are updated."""
+        before = client.get("/api/v1/dev/parameters").json()
+
+        response = client.put("/api/v1/dev/parameters", json={"cleanup_k_top": 7})
+        assert response.status_code == 200
+
+        after = client.get("/api/v1/dev/parameters").json()
+        assert after["cleanup_k_top"] == 7
+        assert after["tau_scale_1"] == before["tau_scale_1"]
+
+    def test_ws_set_ignores_unknown_parameters(self, client):
+        """Test the WebSocket set action cannot touch arbitrary attributes."""
+        with client.websocket_connect("/ws") as ws:
+            assert ws.receive_json(mode="binary")["type"] == "connected"
+            ws.send_json({
+                "type": "dev_params",
+                "action": "set",
+                "params": {"binding_strength": 0.5, "max_shards": 1},
+            })
+            assert ws.receive_json(mode="binary")["status"] == "updated"
+
+            ws.send_json({"type": "dev_params", "action": "get"})
+            params = ws.receive_json(mode="binary")["params"]
+            assert params["binding_strength"] == 0.5
+
+        # REST and WebSocket routes share one engine
+        data = client.get("/api/v1/dev/parameters").json()
+        assert data["binding_strength"] == 0.5
+        assert get_engine().parameters.max_shards != 1
+
+
+class TestWebSocket:
+    """Test WebSocket processing flow."""
+
+    def test_ping(self, client):
+        """Test keepalive round trip through the send queue."""
+        with client.websocket_connect("/ws") as ws:
+            assert ws.receive_json(mode="binary")["type"] == "connected"
+            ws.send_json({"type": "ping"})
+            assert ws.receive_json(mode="binary")["type"] == "pong"
+
+    def test_invalid_json_error_is_flushed(self, client):
+        """Test the error reply is delivered before the connection closes."""
+        with client.websocket_connect("/ws") as ws:
+            assert ws.receive_json(mode="binary")["type"] == "connected"
+            ws.send_text("not json")
+            message = ws.receive_json(mode="binary")
+            assert message["type"] == "error"
+            assert message["message"] == "Invalid JSON"
+
+    def test_process_too_large_is_rejected(self, client, tmp_path, monkeypatch):
+        """Test the upload limit also applies to images sent over the socket."""
+        monkeypatch.setattr(settings, "max_upload_bytes", 16)
+        with client.websocket_connect("/ws") as ws:
+            assert ws.receive_json(mode="binary")["type"] == "connected"
+            ws.send_json({
+                "type": "process",
+                "image_data": base64.b64encode(b"x" * 64).decode(),
+            })
+            message = ws.receive_json(mode="binary")
+            assert message == {"type": "error", "message": "Upload too large"}
+
+        assert job_store.get_job_store().jobs == {}
+        assert not any(tmp_path.iterdir())
+
+    def test_subscribe_to_missing_job(self, client):
+        """Test subscribing to an unknown job is refused without leaking a relay."""
+        with client.websocket_connect("/ws") as ws:
+            assert ws.receive_json(mode="binary")["type"] == "connected"
+            ws.send_json({"type": "subscribe", "job_id": "missing"})
+            message = ws.receive_json(mode="binary")
+            assert message["type"] == "error"
+            assert "job_id" not in message
+
+        assert "missing" not in websocket._forward_tasks
+        assert job_store.get_job_store().channels == {}
+
+    def test_subscribe_to_finished_job(self, client):
+        """Test subscribing to a finished job delivers its outcome at once."""
+        store = job_store.get_job_store()
+
+        async def complete_job():
+            await store.create_job("done", mode="enhance", input_path="unused")
+            await store.set_result("done", b"png bytes")
+            await store.update_job("done", status="completed")
+
+        asyncio.run(complete_job())
+
+        with client.websocket_connect("/ws") as ws:
+            assert ws.receive_json(mode="binary")["type"] == "connected"
+            ws.send_json({"type": "subscribe", "job_id": "done"})
+            assert ws.receive_json(mode="binary")["type"] == "subscribed"
+            message = ws.receive_json(mode="binary")
+            assert message["type"] == "completed"
+            assert base64.b64decode(message["result"]) == b"png bytes"
+
+        assert "done" not in websocket._forward_tasks
+        assert store.channels == {}
+
+    @pytest.mark.asyncio
+    async def test_disconnect_drops_subscriptions(self):
+        """Test disconnecting removes exactly that connection's subscriptions."""
+
+        class StubWebSocket:
+            async def accept(self):
+                pass
+
+            async def send_bytes(self, data):
+                pass
+
+        manager = ConnectionManager()
+        first = await manager.connect(StubWebSocket())
+        second = await manager.connect(StubWebSocket())
+        manager.subscribe_to_job(first, "job-a")
+        manager.subscribe_to_job(first, "job-b")
+        manager.subscribe_to_job(second, "job-b")
+
+        await manager.disconnect(first)
+
+        assert dict(manager.job_subscriptions) == {"job-b": {second}}
+        assert first not in manager.conn_to_jobs
+        await manager.disconnect(second)
+
+    def test_process_streams_progress(self, tmp_path, monkeypatch):
+        """Test a processed image streams progress and completes."""
+        monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+        monkeypatch.setattr(settings, "checkpoint_dir", str(tmp_path / "checkpoints"))
+        monkeypatch.setattr(settings, "holo_presets_dir", str(tmp_path / "presets"))
+
+        with TestClient(app) as client, client.websocket_connect("/ws") as ws:
+            assert ws.receive_json(mode="binary")["type"] == "connected"
+
+            ws.send_json({
+                "type": "process",
+                "image_data": base64.b64encode(b"fake image").decode(),
+                "mode": "de-old-photo",
+            })
+            assert ws.receive_json(mode="binary")["type"] == "processing_started"
+
+            progress_frames = []
+            while True:
+                frame = ws.receive_bytes()
+                if frame[0] == PROGRESS_FRAME_TAG:
+                    progress_frames.append(frame)
+                    continue
+                message = orjson.loads(frame)
+                if message["type"] in ("completed", "error"):
+                    break
+
+            assert progress_frames
+            frame = progress_frames[-1]
+            _, step, total_steps, current_scale, active_shards, percent, id_len = (
+                PROGRESS_FRAME_HEADER.unpack_from(frame)
+            )
+            assert step == total_steps
+            assert percent == pytest.approx(100.0)
+            job_id = frame[PROGRESS_FRAME_HEADER.size:PROGRESS_FRAME_HEADER.size + id_len]
+            assert job_id.decode() == message["job_id"]
+            shards = np.frombuffer(
+                frame, dtype=SHARD_RECORD, offset=PROGRESS_FRAME_HEADER.size + id_len
+            )
+            assert len(shards) == active_shards
+            shard_id, scale, activation, x, y = shards[0].tolist()
+            assert (shard_id, x, y) == (0, 0, 0)
+            assert scale == current_scale
+            assert 0.5 <= activation <= 1.0
+            assert message["type"] == "completed"
+            assert base64.b64decode(message["result"]) == b"fake image"
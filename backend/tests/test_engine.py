@@ -1,6 +1,10 @@
 """
 Tests for the holographic reconstruction engine.
 """
+import asyncio
+import logging
+
+import numpy as np
 import pytest
 from pathlib import Path
 import tempfile
@@ -11,6 +15,8 @@ from app.core.engine import (
     HolographicReconstructionEngine,
     ReconstructionMode,
     ReconstructionProgress,
+    ShardActivation,
+    ShardActivationBatch,
 )
 
 
@@ -54,6 +60,12 @@ class TestHolographicParameters:
         assert params.binding_temperature == 2.0
         assert params.tau_scale_3 == 0.45
 
+    def test_from_preset_returns_copy(self):
+        """Test tuning preset parameters leaves the preset unchanged."""
+        params = HolographicParameters.from_preset(ReconstructionMode.ENHANCE)
+        params.binding_strength = 0.1
+        assert HolographicParameters.from_preset(ReconstructionMode.ENHANCE).binding_strength == 0.9
+
 
 class TestHolographicMemoryBank:
     """Test memory bank operations."""
@@ -71,7 +83,7 @@ class TestHolographicMemoryBank:
         bank.add_shard(1, {"activation": 0.95, "data": [1, 2, 3]})
         bank.add_shard(2, {"activation": 0.85, "data": [4, 5, 6]})
         assert len(bank.shards) == 2
-        assert bank.get_shard(1)["activation"] == 0.95
+        assert bank.get_shard(1)["activation"] == pytest.approx(0.95, abs=1 / 255)
 
     def test_cleanup_low_activation_shards(self):
         """Test cleaning up low activation shards."""
@@ -85,6 +97,80 @@ class TestHolographicMemoryBank:
         assert len(bank.shards) == 2
         assert bank.get_shard(2) is None
 
+    def test_activations_are_quantized(self):
+        """Test activations are stored as uint8 levels and clamped to [0, 1]."""
+        bank = HolographicMemoryBank()
+        bank.add_shard(1, {"activation": 0.92})
+        bank.add_shard(2, {"activation": 0.918})
+        bank.add_shard(3, {"activation": 1.5})
+        bank.add_shard(4, {"activation": -0.2})
+
+        assert bank.get_shard(3)["activation"] == 1.0
+        assert bank.get_shard(4)["activation"] == 0.0
+        # A shard at the threshold survives cleanup; one level below does not
+        assert bank.cleanup_low_activation_shards(threshold=0.92) == 2
+        assert sorted(bank.shards) == [1, 3]
+
+    def test_nan_activation_is_rejected(self):
+        """Test a NaN activation raises before the bank is changed."""
+        bank = HolographicMemoryBank()
+        with pytest.raises(ValueError, match="NaN activation"):
+            bank.add_shard(1, {"activation": float("nan")})
+        assert bank.shard_count == 0
+
+    def test_add_shard_grows_and_overwrites(self):
+        """Test the shard arrays grow past their capacity and ids stay unique."""
+        bank = HolographicMemoryBank()
+        count = HolographicMemoryBank.INITIAL_CAPACITY * 2 + 1
+        for i in range(count):
+            bank.add_shard(i, {"activation": 0.5})
+        bank.add_shard(0, {"activation": 0.99, "data": [1]})
+
+        assert bank.shard_count == count
+        assert bank.get_shard(0) == {"activation": pytest.approx(0.99, abs=1 / 255), "data": [1]}
+        assert bank.cleanup_low_activation_shards(threshold=0.9) == count - 1
+        assert list(bank.shards) == [0]
+
+    def test_add_shard_evicts_least_active_when_full(self):
+        """Test a full bank evicts its lowest-activation shards for new ones."""
+        bank = HolographicMemoryBank(max_shards=32)
+        for i in range(32):
+            bank.add_shard(i, {"activation": 0.5 + i / 100})
+        bank.add_shard(0, {"activation": 0.99})  # overwrite, no eviction
+        assert bank.shard_count == 32
+
+        bank.add_shard(100, {"activation": 0.1})
+        assert bank.shard_count == 32 - 2 + 1
+        assert bank.get_shard(1) is None and bank.get_shard(2) is None
+        assert bank.get_shard(0)["activation"] == pytest.approx(0.99, abs=1 / 255)
+        assert bank.get_shard(100)["activation"] == pytest.approx(0.1, abs=1 / 255)
+
+    def test_cleanup_dissimilar_shards(self):
+        """Test cosine cleanup against a reference embedding."""
+        bank = HolographicMemoryBank()
+        bank.add_shard(1, {"embedding": [1.0, 0.0]})
+        bank.add_shard(2, {"embedding": [0.96, 0.28]})  # cos 0.96
+        bank.add_shard(3, {"embedding": [0.0, 1.0]})  # cos 0.0
+        bank.add_shard(4, {"embedding": [-1.0, 0.0]})  # cos -1.0
+        bank.add_shard(5, {"activation": 0.5})  # no embedding
+
+        removed = bank.cleanup_dissimilar_shards([2.0, 0.0], threshold=0.92)
+        assert removed == 2
+        assert sorted(bank.shards) == [1, 2, 5]
+        assert bank.get_shard(2)["embedding"].tolist() == pytest.approx([0.96, 0.28])
+
+    def test_incoherent_shards(self):
+        """Test shards without a similar peer are reported."""
+        bank = HolographicMemoryBank()
+        bank.add_shard(1, {"embedding": [1.0, 0.0]})
+        bank.add_shard(2, {"embedding": [0.96, 0.28]})  # cos 0.96 with 1
+        bank.add_shard(3, {"embedding": [0.0, 2.0]})  # cos <= 0.28 with both
+        bank.add_shard(4, {"activation": 0.5})  # no embedding
+        bank.SIMILARITY_BLOCK = 2  # exercise more than one block
+
+        assert bank.incoherent_shards(threshold=0.92) == [3]
+        assert bank.incoherent_shards(threshold=0.2) == []
+
     def test_save_and_load(self):
         """Test saving and loading memory bank."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -99,6 +185,61 @@ class TestHolographicMemoryBank:
             loaded = HolographicMemoryBank.load(path)
             assert loaded.name == "test_bank"
             assert len(loaded.shards) == 1
+            assert loaded.get_shard(1)["activation"] == pytest.approx(0.95, abs=1 / 255)
+
+    def test_save_and_load_round_trips_shard_arrays(self, tmp_path):
+        """Test embeddings and extra fields survive the archive format."""
+        path = tmp_path / "test.holo"
+        bank = HolographicMemoryBank(name="arrays")
+        bank.add_shard(7, {"activation": 0.5, "embedding": [3.0, 4.0], "tag": "a"})
+        bank.add_shard(9, {"activation": 0.25, "data": [1, 2]})
+        bank.save(path)
+
+        loaded = HolographicMemoryBank.load(path)
+        assert loaded.shards.keys() == bank.shards.keys()
+        assert loaded.get_shard(9) == bank.get_shard(9)
+        assert loaded.get_shard(7)["embedding"].tolist() == [3.0, 4.0]
+        assert loaded.get_shard(7)["tag"] == "a"
+        assert loaded.cleanup_dissimilar_shards([0.0, 1.0], threshold=0.92) == 1
+        # Loaded arrays keep growing like freshly built ones
+        for shard_id in range(100, 100 + HolographicMemoryBank.INITIAL_CAPACITY):
+            loaded.add_shard(shard_id, {"embedding": [1.0, 0.0]})
+        assert loaded.shard_count == HolographicMemoryBank.INITIAL_CAPACITY + 1
+
+    def test_save_shard_fields_with_non_str_keys(self, tmp_path):
+        """Test int-keyed shard fields save, coming back with string keys."""
+        path = tmp_path / "keys.holo"
+        bank = HolographicMemoryBank(name="keys")
+        bank.add_shard(1, {"activation": 0.5, "per_scale": {1: 0.25}})
+        bank.save(path)
+
+        loaded = HolographicMemoryBank.load(path)
+        assert loaded.get_shard(1)["per_scale"] == {"1": 0.25}
+
+    def test_load_legacy_json_bank(self, tmp_path):
+        """Test banks saved as JSON before the archive format still load."""
+        path = tmp_path / "legacy.holo"
+        path.write_bytes(
+            b'{"name": "old", "version": "1.0.0", "shards": {"3": {"activation": 1.0}}}'
+        )
+
+        loaded = HolographicMemoryBank.load(path)
+        assert loaded.name == "old"
+        assert loaded.get_shard(3) == {"activation": 1.0}
+
+    def test_load_keeps_most_active_within_max_shards(self, tmp_path, caplog):
+        """Test loading into a smaller cap warns and keeps the most active shards."""
+        path = tmp_path / "big.holo"
+        bank = HolographicMemoryBank(name="big")
+        for shard_id in range(4):
+            bank.add_shard(shard_id, {"activation": shard_id / 4})
+        bank.save(path)
+
+        with caplog.at_level(logging.WARNING):
+            loaded = HolographicMemoryBank.load(path, max_shards=2)
+        assert loaded.max_shards == 2
+        assert sorted(loaded.shards) == [2, 3]
+        assert "holds 4 shards but max_shards is 2" in caplog.text
 
 
 class TestHolographicReconstructionEngine:
@@ -147,6 +288,15 @@ class TestHolographicReconstructionEngine:
         engine.operation_count = 200
         assert engine.should_run_integrity_check(interval=100)
 
+    def test_run_integrity_check(self):
+        """Test the integrity check fails on an incoherent memory bank."""
+        engine = HolographicReconstructionEngine()
+        assert engine.run_integrity_check()
+
+        engine.memory_bank.add_shard(1, {"embedding": [1.0, 0.0]})
+        engine.memory_bank.add_shard(2, {"embedding": [0.0, 1.0]})
+        assert not engine.run_integrity_check()
+
     @pytest.mark.asyncio
     async def test_reconstruct_basic(self):
         """Test basic reconstruction."""
@@ -160,6 +310,85 @@ class TestHolographicReconstructionEngine:
         assert result == input_data  # Placeholder returns same data
         assert engine.operation_count > 0
 
+    @pytest.mark.asyncio
+    async def test_reconstruct_reports_shard_batches(self):
+        """Test progress carries array-backed shard activations."""
+        engine = HolographicReconstructionEngine()
+        progress_updates = []
+        engine.set_progress_callback(progress_updates.append)
+        engine.parameters.cleanup_k_top = 12
+
+        await engine.reconstruct(b"test_image_data", ReconstructionMode.CUSTOM)
+
+        last = progress_updates[-1].shard_activations
+        assert len(last) == engine.MAX_ACTIVE_SHARDS
+        assert last.coordinates.tolist()[:2] == [[0, 0], [1, 0]]
+        shard = next(iter(last))
+        assert isinstance(shard, ShardActivation)
+        assert shard.scale == progress_updates[-1].current_scale
+        assert len(progress_updates[0].shard_activations) == 1
+
+    @pytest.mark.asyncio
+    async def test_reconstruct_reports_every_step_in_blocks(self):
+        """Test blocked steps still report each step, including a partial last block."""
+        engine = HolographicReconstructionEngine()
+        progress_updates = []
+        engine.set_progress_callback(progress_updates.append)
+        engine.parameters.cleanup_k_top = engine.STEP_BLOCK + 2
+
+        await engine.reconstruct(b"test_image_data", ReconstructionMode.CUSTOM)
+
+        total = engine.parameters.cleanup_k_top
+        assert [p.step for p in progress_updates] == list(range(1, total + 1))
+        for p in progress_updates:
+            assert p.current_scale == ((p.step - 1) % engine.memory_bank.scale_count) + 1
+            assert set(p.shard_activations.scales.tolist()) == {p.current_scale}
+        assert engine.operation_count == total
+
+    @pytest.mark.asyncio
+    async def test_progress_min_interval_drops_intermediate_steps(self):
+        """Test throttled progress still delivers the first and final step."""
+        engine = HolographicReconstructionEngine()
+        progress_updates = []
+        engine.set_progress_callback(progress_updates.append, min_interval=60.0)
+        engine.parameters.cleanup_k_top = 7
+
+        await engine.reconstruct(b"test_image_data", ReconstructionMode.CUSTOM)
+        assert [p.step for p in progress_updates] == [1, 7]
+
+        # Every run starts over with its first step
+        await engine.reconstruct(b"test_image_data", ReconstructionMode.CUSTOM)
+        assert [p.step for p in progress_updates] == [1, 7, 1, 7]
+
+    @pytest.mark.asyncio
+    async def test_progress_min_interval_delivers_newest_held_step(self):
+        """Test the throttle delivers the newest held back update once the interval ends."""
+        engine = HolographicReconstructionEngine()
+        progress_updates = []
+        engine.set_progress_callback(progress_updates.append, min_interval=0.05)
+
+        for step in range(1, 5):
+            engine._emit_progress(ReconstructionProgress(
+                step=step, total_steps=10, current_scale=1, active_shards=1
+            ))
+        assert [p.step for p in progress_updates] == [1]
+
+        await asyncio.sleep(0.1)
+        assert [p.step for p in progress_updates] == [1, 4]
+
+    @pytest.mark.asyncio
+    async def test_reconstruct_stage_failure_propagates(self):
+        """Test a failing pipeline stage aborts the reconstruction."""
+        engine = HolographicReconstructionEngine()
+        engine.parameters.cleanup_k_top = 5
+
+        def failing_callback(progress: ReconstructionProgress):
+            raise RuntimeError("callback failed")
+
+        engine.set_progress_callback(failing_callback)
+        with pytest.raises(RuntimeError, match="callback failed"):
+            await engine.reconstruct(b"test_image_data", ReconstructionMode.CUSTOM)
+
 
 class TestReconstructionProgress:
     """Test progress reporting."""
@@ -193,3 +422,26 @@ class TestReconstructionProgress:
             active_shards=25
         )
         assert progress.progress_percent == 100.0
+
+    def test_progress_with_shard_batches_compares_by_value(self):
+        """Test progress objects holding equal shard arrays compare equal."""
+        def progress():
+            return ReconstructionProgress(
+                step=1,
+                total_steps=2,
+                current_scale=1,
+                active_shards=1,
+                shard_activations=ShardActivationBatch(
+                    shard_ids=np.array([0], dtype=np.int32),
+                    scales=np.array([1], dtype=np.uint8),
+                    activations=np.array([0.5], dtype=np.float32),
+                    coordinates=np.zeros((1, 2), dtype=np.int32),
+                ),
+            )
+
+        assert progress() == progress()
+        assert progress() != ReconstructionProgress(
+            step=1, total_steps=2, current_scale=1, active_shards=1
+        )
+        with pytest.raises(TypeError):
+            hash(progress().shard_activations)
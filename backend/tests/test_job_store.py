@@ -0,0 +1,177 @@
+"""
+Tests for the in-memory and Redis job stores.
+"""
+import pytest
+import pytest_asyncio
+
+from app.services.job_store import InMemoryJobStore, RedisJobStore
+
+
+@pytest_asyncio.fixture
+async def redis_store(monkeypatch):
+    """Redis job store backed by fakeredis."""
+    fakeredis = pytest.importorskip("fakeredis")
+    import redis.asyncio as redis
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        redis.Redis,
+        "from_url",
+        lambda url: fakeredis.aioredis.FakeRedis(server=server),
+    )
+    store = RedisJobStore("redis://fake", ttl=60)
+    yield store
+    await store.close()
+
+
+class TestInMemoryJobStore:
+    """Test in-memory job storage and eviction."""
+
+    @pytest.mark.asyncio
+    async def test_create_and_get_job(self, tmp_path):
+        """Test a created job is queued with zero progress."""
+        store = InMemoryJobStore()
+        await store.create_job("job-1", mode="enhance", input_path=str(tmp_path / "in"))
+
+        job = await store.get_job("job-1")
+        assert job.status == "queued"
+        assert job.progress == 0.0
+        assert await store.get_job("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_batch_jobs(self, tmp_path):
+        """Test batch lookup returns only that batch's jobs."""
+        store = InMemoryJobStore()
+        for job_id in ("a", "b", "c"):
+            batch_id = "batch-1" if job_id != "c" else None
+            await store.create_job(
+                job_id, mode="enhance", input_path=str(tmp_path / job_id), batch_id=batch_id
+            )
+        await store.add_batch("batch-1", ["a", "b"])
+
+        assert len(await store.get_batch_jobs("batch-1")) == 2
+        assert await store.get_batch_jobs("missing") == []
+
+    @pytest.mark.asyncio
+    async def test_sweep_evicts_expired_finished_jobs(self, tmp_path):
+        """Test only finished jobs past the TTL are evicted, with their input."""
+        store = InMemoryJobStore(ttl=0)
+        input_path = tmp_path / "done"
+        input_path.write_bytes(b"image")
+        await store.create_job("done", mode="enhance", input_path=str(input_path))
+        await store.create_job("pending", mode="enhance", input_path=str(tmp_path / "p"))
+        await store.update_job("done", status="completed")
+        await store.set_result("done", b"result")
+
+        assert await store.sweep() == 1
+        assert await store.get_job("done") is None
+        assert await store.get_result("done") is None
+        assert not input_path.exists()
+        assert await store.get_job("pending") is not None
+
+    @pytest.mark.asyncio
+    async def test_max_jobs_evicts_oldest(self, tmp_path):
+        """Test the store never holds more than max_jobs jobs."""
+        store = InMemoryJobStore(max_jobs=2)
+        for job_id in ("first", "second", "third"):
+            await store.create_job(job_id, mode="enhance", input_path=str(tmp_path / job_id))
+
+        assert await store.get_job("first") is None
+        assert await store.get_job("second") is not None
+        assert await store.get_job("third") is not None
+
+    @pytest.mark.asyncio
+    async def test_result_of_evicted_job_is_dropped(self, tmp_path):
+        """Test a result arriving after its job was evicted is not kept."""
+        store = InMemoryJobStore(max_jobs=1)
+        await store.create_job("first", mode="enhance", input_path=str(tmp_path / "first"))
+        await store.create_job("second", mode="enhance", input_path=str(tmp_path / "second"))
+
+        await store.set_result("first", b"result")
+        assert store.results == {}
+
+    @pytest.mark.asyncio
+    async def test_has_subscribers(self):
+        """Test subscriber tracking follows the lifetime of a subscription."""
+        store = InMemoryJobStore()
+        assert not await store.has_subscribers("job-1")
+
+        events = await store.subscribe("job-1")
+        assert await store.has_subscribers("job-1")
+
+        await store.publish("job-1", {"type": "completed"})
+        assert (await anext(events))["type"] == "completed"
+        await events.aclose()
+        assert not await store.has_subscribers("job-1")
+
+    @pytest.mark.asyncio
+    async def test_subscription_closed_without_iterating(self):
+        """Test closing a subscription that was never iterated unsubscribes it."""
+        store = InMemoryJobStore()
+        events = await store.subscribe("job-1")
+        assert await store.has_subscribers("job-1")
+
+        await events.aclose()
+        assert not await store.has_subscribers("job-1")
+        await events.aclose()  # closing again is harmless
+        assert store.channels == {}
+
+
+class TestRedisJobStore:
+    """Test the Redis job store against fakeredis."""
+
+    @pytest.mark.asyncio
+    async def test_create_and_get_job(self, redis_store, tmp_path):
+        """Test jobs round-trip through the Redis hash."""
+        input_path = tmp_path / "in"
+        input_path.write_bytes(b"image")
+        await redis_store.create_job(
+            "job-1", mode="enhance", input_path=str(input_path), batch_id="b"
+        )
+        await redis_store.update_job("job-1", status="processing", progress=50.0)
+
+        job = await redis_store.get_job("job-1")
+        assert (job.status, job.progress, job.batch_id) == ("processing", 50.0, "b")
+        assert job.result_content_type is None
+        assert await redis_store.get_job("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_queue_and_batches(self, redis_store, tmp_path):
+        """Test the work queue is FIFO and batches list their jobs."""
+        for job_id in ("a", "b"):
+            (tmp_path / job_id).write_bytes(b"image")
+            await redis_store.create_job(
+                job_id, mode="enhance", input_path=str(tmp_path / job_id)
+            )
+            await redis_store.enqueue(job_id)
+        await redis_store.add_batch("batch-1", ["a", "b"])
+
+        assert [await redis_store.dequeue() for _ in range(2)] == ["a", "b"]
+        assert len(await redis_store.get_batch_jobs("batch-1")) == 2
+
+    @pytest.mark.asyncio
+    async def test_input_moved_into_redis(self, redis_store, tmp_path):
+        """Test the spooled upload is stored in Redis for remote workers."""
+        input_path = tmp_path / "in"
+        input_path.write_bytes(b"image")
+        await redis_store.create_job("job-1", mode="enhance", input_path=str(input_path))
+
+        assert not input_path.exists()
+        assert await redis_store.get_input("job-1") == b"image"
+        assert 0 < await redis_store.redis.ttl("job:job-1:input") <= 60
+        await redis_store.delete_input("job-1")
+        assert await redis_store.get_input("job-1") is None
+
+    @pytest.mark.asyncio
+    async def test_subscription_lifetime(self, redis_store):
+        """Test subscribers are counted until closed, iterated or not."""
+        events = await redis_store.subscribe("job-1")
+        assert await redis_store.has_subscribers("job-1")
+        await redis_store.publish("job-1", {"type": "completed"})
+        assert (await anext(events))["type"] == "completed"
+        await events.aclose()
+        assert not await redis_store.has_subscribers("job-1")
+
+        unused = await redis_store.subscribe("job-2")
+        await unused.aclose()
+        assert not await redis_store.has_subscribers("job-2")
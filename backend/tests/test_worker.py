@@ -0,0 +1,107 @@
+"""
+Tests for the reconstruction worker.
+"""
+import asyncio
+import threading
+
+import pytest
+
+from app.core.engine import HolographicReconstructionEngine, ReconstructionProgress
+from app.core.self_healing import SelfHealingWatchdog
+from app.services import job_store
+from app.services import worker as worker_module
+from app.services.worker import ReconstructionWorker
+
+
+class BurstEngine(HolographicReconstructionEngine):
+    """Engine that reports far more progress than anyone can render."""
+
+    async def reconstruct(self, input_image, mode=None):
+        for step in range(1, 1001):
+            self._emit_progress(
+                ReconstructionProgress(
+                    step=step, total_steps=1000, current_scale=1, active_shards=0
+                )
+            )
+        return input_image
+
+
+class StaggeredEngine(HolographicReconstructionEngine):
+    """Engine that reports its steps in bursts, like blocked kernel calls."""
+
+    async def reconstruct(self, input_image, mode=None):
+        for start in (0, 5):
+            for step in range(start + 1, start + 6):
+                self._emit_progress(
+                    ReconstructionProgress(
+                        step=step, total_steps=10, current_scale=1, active_shards=0
+                    )
+                )
+            await asyncio.sleep(0.2)
+        return input_image
+
+
+class TestReconstructionWorker:
+    """Test job processing and progress publishing."""
+
+    @pytest.mark.asyncio
+    async def test_progress_is_coalesced(self, tmp_path, monkeypatch):
+        """Test a burst of progress updates publishes only the latest one."""
+        store = job_store.InMemoryJobStore()
+        monkeypatch.setattr(job_store, "_job_store", store)
+        input_path = tmp_path / "input"
+        input_path.write_bytes(b"image")
+        await store.create_job("job-1", mode="enhance", input_path=str(input_path))
+        events = await store.subscribe("job-1")
+
+        worker = ReconstructionWorker(BurstEngine(), SelfHealingWatchdog())
+        await worker.reconstruct_task("job-1")
+
+        received = []
+        async for event in events:
+            received.append(event)
+            if event["type"] == "completed":
+                break
+
+        progress = [e for e in received if e["type"] == "progress"]
+        assert len(progress) == 1
+        assert progress[0]["step"] == 1000
+        assert (await store.get_job("job-1")).status == "completed"
+        assert not input_path.exists()
+
+    @pytest.mark.asyncio
+    async def test_published_progress_is_newest_of_burst(self, tmp_path, monkeypatch):
+        """Test each burst publishes its newest step, not its first."""
+        store = job_store.InMemoryJobStore()
+        monkeypatch.setattr(job_store, "_job_store", store)
+        input_path = tmp_path / "input"
+        input_path.write_bytes(b"image")
+        await store.create_job("job-1", mode="enhance", input_path=str(input_path))
+        events = await store.subscribe("job-1")
+
+        worker = ReconstructionWorker(StaggeredEngine(), SelfHealingWatchdog())
+        await worker.reconstruct_task("job-1")
+
+        steps = []
+        async for event in events:
+            if event["type"] == "completed":
+                break
+            steps.append(event["step"])
+        await events.aclose()
+        assert steps == [5, 10]
+
+    @pytest.mark.asyncio
+    async def test_start_warms_kernels_off_the_event_loop(self, monkeypatch):
+        """Test kernels are compiled in a worker thread before jobs are taken."""
+        threads = []
+        monkeypatch.setattr(
+            worker_module, "warm_up_kernels", lambda: threads.append(threading.current_thread())
+        )
+        monkeypatch.setattr(job_store, "_job_store", job_store.InMemoryJobStore())
+
+        worker = ReconstructionWorker(HolographicReconstructionEngine(), SelfHealingWatchdog())
+        await worker.start()
+        await worker.stop()
+
+        assert len(threads) == 1
+        assert threads[0] is not threading.main_thread()
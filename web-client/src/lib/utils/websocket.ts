@@ -16,6 +16,7 @@ import {
 } from '$stores';
 
 let ws: WebSocket | null = null;
+const decoder = new TextDecoder();
 let reconnectAttempts = 0;
 const maxReconnectAttempts = 10;
 const reconnectDelay = 3000;
@@ -30,6 +31,8 @@ export function connect(url?: string): void {
 
 	try {
 		ws = new WebSocket(wsUrl);
+		// Server sends JSON as binary frames
+		ws.binaryType = 'arraybuffer';
 
 		ws.onopen = () => {
 			console.log('WebSocket connected');
@@ -56,7 +59,13 @@ export function connect(url?: string): void {
 		};
 
 		ws.onmessage = (event) => {
-			handleMessage(JSON.parse(event.data));
+			if (typeof event.data === 'string') {
+				handleMessage(JSON.parse(event.data));
+			} else if (new Uint8Array(event.data)[0] === PROGRESS_FRAME_TAG) {
+				handleProgressFrame(new DataView(event.data));
+			} else {
+				handleMessage(JSON.parse(decoder.decode(event.data)));
+			}
 		};
 	} catch (error) {
 		console.error('WebSocket connection failed:', error);
@@ -134,6 +143,47 @@ export function setDevParams(params: Partial<DevParameters>): void {
 	});
 }
 
+// Packed shard activation record (see SHARD_RECORD in the backend worker):
+// shard_id int32, scale uint8, activation float32, x int32, y int32
+const SHARD_RECORD_SIZE = 17;
+
+// Binary progress frame (see PROGRESS_FRAME_HEADER in the backend websocket routes):
+// tag uint8, step uint32, total_steps uint32, current_scale uint8, active_shards uint16,
+// progress_percent float32, job id length uint8, then the job id and shard records
+const PROGRESS_FRAME_TAG = 0x01;
+const PROGRESS_FRAME_HEADER_SIZE = 17;
+
+/**
+ * Unpack shard activation records from offset to the end of the view
+ */
+function unpackShardActivations(view: DataView, start: number): ShardActivation[] {
+	const shards: ShardActivation[] = [];
+	for (let offset = start; offset + SHARD_RECORD_SIZE <= view.byteLength; offset += SHARD_RECORD_SIZE) {
+		shards.push({
+			shard_id: view.getInt32(offset, true),
+			scale: view.getUint8(offset + 4),
+			activation: view.getFloat32(offset + 5, true),
+			coordinates: [view.getInt32(offset + 9, true), view.getInt32(offset + 13, true)]
+		});
+	}
+	return shards;
+}
+
+/**
+ * Handle a binary progress frame
+ */
+function handleProgressFrame(view: DataView): void {
+	const idLength = view.getUint8(16);
+	const idBytes = new Uint8Array(view.buffer, view.byteOffset + PROGRESS_FRAME_HEADER_SIZE, idLength);
+	updateJob({
+		id: decoder.decode(idBytes),
+		status: 'processing',
+		progress: view.getFloat32(12, true),
+		mode: ''
+	});
+	shardActivations.set(unpackShardActivations(view, PROGRESS_FRAME_HEADER_SIZE + idLength));
+}
+
 /**
  * Handle incoming WebSocket message
  */
@@ -152,16 +202,6 @@ function handleMessage(message: { type: string; [key: string]: unknown }): void
 			});
 			break;
 
-		case 'progress':
-			updateJob({
-				id: message.job_id as string,
-				status: 'processing',
-				progress: message.progress_percent as number,
-				mode: ''
-			});
-			shardActivations.set(message.shard_activations as ShardActivation[]);
-			break;
-
 		case 'completed':
 			updateJob({
 				id: message.job_id as string,